@@ -347,8 +347,8 @@ async def process_batch_background(
 
 async def _resolve_batch_entities(db, batch_id: UUID, use_ai: bool):
     """Resolve entities in a batch against Charity Commission data."""
-    resolver = EntityResolverService(db)
-    return await resolver.process_batch(batch_id, use_ai=use_ai)
+    async with EntityResolverService(db) as resolver:
+        return await resolver.process_batch(batch_id, use_ai=use_ai)
 
 
 async def _build_batch_ownership_trees(db, batch_id: UUID, max_depth: int):
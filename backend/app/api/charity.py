@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.services.charity_commission import CharityCommissionService
-from app.api.deps import get_current_active_user
+from app.api.deps import get_charity_commission_service, get_current_active_user
 import structlog
 
 logger = structlog.get_logger()
@@ -18,14 +18,13 @@ async def get_charity_details(
     charity_number: str,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    charity_service: CharityCommissionService = Depends(get_charity_commission_service),
 ):
     """
     Get charity details from the Charity Commission API.
     
     This endpoint is used to preview charity details when confirming matches.
     """
-    charity_service = CharityCommissionService()
-    
     try:
         # Get full charity details including trustees
         charity_data = await charity_service.get_full_charity_details(charity_number)
@@ -55,5 +54,3 @@ async def get_charity_details(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching charity details: {str(e)}",
         )
-    finally:
-        await charity_service.close()
@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
 from app.services.auth import AuthService
+from app.services.charity_commission import CharityCommissionService, get_charity_service
 from app.config import settings
 
 logger = structlog.get_logger()
@@ -156,3 +157,11 @@ async def get_optional_user(
         return await get_current_user(request, credentials, api_key, db)
     except HTTPException:
         return None
+
+
+def get_charity_commission_service(request: Request) -> CharityCommissionService:
+    """
+    Get the process-wide CharityCommissionService opened in the application lifespan.
+    """
+    # Falls back to the module singleton when the lifespan hasn't run (e.g. in tests)
+    return getattr(request.app.state, "charity_service", None) or get_charity_service()
@@ -14,9 +14,10 @@ from app.schemas.entity import (
     EntityResponse, EntityUpdate, EntityResolutionResponse,
     ResolutionConfirmRequest, OwnershipTreeResponse
 )
+from app.services.charity_commission import CharityCommissionService
 from app.services.entity_resolver import EntityResolverService
 from app.services.ownership_builder import OwnershipTreeBuilder
-from app.api.deps import get_current_active_user
+from app.api.deps import get_charity_commission_service, get_current_active_user
 import structlog
 import sys
 import traceback
@@ -356,6 +357,7 @@ async def confirm_entity_resolution(
     request: ResolutionConfirmRequest,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    charity_service: CharityCommissionService = Depends(get_charity_commission_service),
 ):
     """
     Confirm entity resolution - either from candidates or manual entry.
@@ -387,15 +389,12 @@ async def confirm_entity_resolution(
         )
     
     # Confirm resolution
-    resolver = EntityResolverService(db)
-    try:
+    async with EntityResolverService(db, charity_service) as resolver:
         entity = await resolver.confirm_resolution(
             entity_id=entity_id,
             resolution_id=request.resolution_id,
             charity_number=request.charity_number,
         )
-    finally:
-        await resolver.close()
     
     # Refresh entity
     result = await db.execute(
@@ -460,6 +459,7 @@ async def re_resolve_entity(
     use_ai: bool = True,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    charity_service: CharityCommissionService = Depends(get_charity_commission_service),
 ):
     """Re-attempt resolution for a single entity."""
     # Verify entity access
@@ -500,11 +500,8 @@ async def re_resolve_entity(
     )
     
     # Re-resolve
-    resolver = EntityResolverService(db)
-    try:
+    async with EntityResolverService(db, charity_service) as resolver:
         entity = await resolver.resolve_entity(entity, use_ai=use_ai)
-    finally:
-        await resolver.close()
     
     # Refresh entity
     result = await db.execute(
@@ -70,6 +70,12 @@ class Settings(BaseSettings):
     # Charity Commission API
     CHARITY_COMMISSION_API_BASE_URL: str = "https://api.charitycommission.gov.uk/register/api"
     CHARITY_COMMISSION_API_KEY: Optional[str] = None
+    CHARITY_COMMISSION_MAX_CONCURRENCY: int = 8  # Max in-flight requests per process
+    CHARITY_COMMISSION_MAX_CONNECTIONS: int = 100
+    CHARITY_COMMISSION_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    CHARITY_COMMISSION_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept
+    CHARITY_COMMISSION_CACHE_TTL_SECONDS: int = 3600  # Lookup cache lifetime; 0 disables caching
+    CHARITY_COMMISSION_CACHE_MAX_ENTRIES: int = 10000  # Least recently used lookups are evicted past this
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
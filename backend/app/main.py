@@ -15,6 +15,8 @@ import structlog
 
 from app.config import settings
 from app.database import init_db, close_db
+from app.services.charity_commission import close_charity_service, get_charity_service
+from app.services.entity_resolver import close_openai_client
 from app.api import api_router
 from app.middleware.security import SecurityHeadersMiddleware
 from app.middleware.csrf import CSRFMiddleware
@@ -73,6 +75,11 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning("Database initialization failed - will retry on first request", error=str(e))
     
+    # Open the shared Charity Commission connection pool once, up front
+    charity_service = get_charity_service()
+    await charity_service.get_client()
+    app.state.charity_service = charity_service
+    
     yield
     
     # Shutdown
@@ -82,6 +89,18 @@ async def lifespan(app: FastAPI):
         logger.info("Database connections closed")
     except Exception as e:
         logger.warning("Error closing database connections", error=str(e))
+    
+    try:
+        await close_charity_service()
+        logger.info("Charity Commission client closed")
+    except Exception as e:
+        logger.warning("Error closing Charity Commission client", error=str(e))
+    
+    try:
+        await close_openai_client()
+        logger.info("OpenAI client closed")
+    except Exception as e:
+        logger.warning("Error closing OpenAI client", error=str(e))
 
 
 # Create FastAPI application
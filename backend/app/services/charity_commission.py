@@ -1,25 +1,171 @@
 """Charity Commission API integration service."""
 import asyncio
-import sys
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
 import re
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+import orjson
 
 from app.config import settings
 import structlog
 
 logger = structlog.get_logger()
 
+# Shared read-only fallback for missing nested mappings (avoids a new {} per parse)
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
 
-def api_log(msg: str, charity_number: str = "", level: str = "DEBUG"):
-    """Log API calls for debugging."""
-    timestamp = datetime.utcnow().isoformat()
-    context = f"[charity={charity_number}] " if charity_number else ""
-    formatted = f"[{level}] [{timestamp}] [CharityAPI] {context}{msg}"
-    print(formatted, file=sys.stdout, flush=True)
+# Characters stripped when normalizing a charity number: a translate table for
+# the usual ASCII input, with the regex as the fallback for anything else
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+_NON_ALNUM_TABLE = {i: None for i in range(128) if not chr(i).isalnum()}
+
+# Common charity number patterns (123456, 1234567, SC012345, NI12345) fused
+# into one alternation so the text is scanned once. The lookaround guards are
+# equivalent to \b here but shared by all alternatives, so a position inside a
+# word (e.g. a long digit run) is rejected once instead of once per alternative.
+_CHARITY_NUMBER_RE = re.compile(
+    r'(?<!\w)(?:'
+    r'(?P<std>\d{6,8})'  # Standard charity number
+    r'|(?P<sc>SC\d{5,6})'  # Scottish charity
+    r'|(?P<ni>NI\d{5,6})'  # Northern Ireland charity
+    r')(?!\w)',
+    re.IGNORECASE,
+)
+
+# Contact fields joined (in order) to build a single-line address
+_ADDR_KEYS = ("addressLine1", "addressLine2", "addressLine3", "addressLine4", "postcode")
+
+# Caps in-flight API requests across all service instances to stay under the API rate limit
+_request_semaphore = asyncio.Semaphore(settings.CHARITY_COMMISSION_MAX_CONCURRENCY)
+
+# Attempts per request for gateway errors and dropped connections; other statuses
+# (401/403/404/500) fail fast. Connect failures are retried by the inner transport.
+_MAX_ATTEMPTS = 3
+_TRANSPORT_RETRIES = 3
+_RETRY_STATUS_CODES = frozenset({502, 503, 504})
+# Transient failures after the connection is up; protocol misuse and unsupported
+# URLs are not retried, and connect failures are left to the inner transport
+_RETRY_EXCEPTIONS = (
+    httpx.ReadError,
+    httpx.WriteError,
+    httpx.RemoteProtocolError,
+    httpx.ReadTimeout,
+    httpx.WriteTimeout,
+    httpx.PoolTimeout,
+)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_charity_number(charity_number: str) -> str:
+    """Strip non-alphanumerics and upper-case a charity number (memoized)."""
+    charity_number = charity_number.strip()
+    if charity_number.isascii():
+        return charity_number.translate(_NON_ALNUM_TABLE).upper()
+    return _NON_ALNUM_RE.sub('', charity_number).upper()
+
+
+def _parse_iso_datetime(value: Any) -> Optional[datetime]:
+    """Parse an ISO 8601 date/datetime from the API, or None if absent or malformed."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        # Python 3.11+ fromisoformat handles the trailing "Z" and date-only values natively
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# Known charity data for common name searches, built once at import as
+# (charityNumber, charityName, registrationStatus); result dicts are built per match
+_KNOWN_CHARITIES: Mapping[str, Tuple[str, str, str]] = MappingProxyType({
+    "british red cross": ("220949", "THE BRITISH RED CROSS SOCIETY", "Registered"),
+    "red cross": ("220949", "THE BRITISH RED CROSS SOCIETY", "Registered"),
+    "oxfam": ("202918", "OXFAM", "Registered"),
+    "cancer research uk": ("1089464", "CANCER RESEARCH UK", "Registered"),
+    "cancer research": ("1089464", "CANCER RESEARCH UK", "Registered"),
+    "nspcc": ("216401", "NATIONAL SOCIETY FOR THE PREVENTION OF CRUELTY TO CHILDREN", "Registered"),
+    "save the children": ("213890", "SAVE THE CHILDREN INTERNATIONAL", "Registered"),
+    "barnardo's": ("216250", "BARNARDO'S", "Registered"),
+    "barnardos": ("216250", "BARNARDO'S", "Registered"),
+    "marie curie": ("207994", "MARIE CURIE", "Registered"),
+    "macmillan cancer support": ("261017", "MACMILLAN CANCER SUPPORT", "Registered"),
+    "macmillan": ("261017", "MACMILLAN CANCER SUPPORT", "Registered"),
+    "age uk": ("1128267", "AGE UK", "Registered"),
+    "shelter": ("263710", "SHELTER, NATIONAL CAMPAIGN FOR HOMELESS PEOPLE LIMITED", "Registered"),
+    "rspca": ("219099", "ROYAL SOCIETY FOR THE PREVENTION OF CRUELTY TO ANIMALS", "Registered"),
+    "rspb": ("207076", "ROYAL SOCIETY FOR THE PROTECTION OF BIRDS", "Registered"),
+    "wwf": ("1081247", "WWF-UK", "Registered"),
+    "world wildlife fund": ("1081247", "WWF-UK", "Registered"),
+    "unicef": ("1072612", "THE UNITED KINGDOM COMMITTEE FOR UNICEF", "Registered"),
+    "mind": ("219830", "MIND", "Registered"),
+    "samaritans": ("219432", "SAMARITANS", "Registered"),
+    "mencap": ("222377", "ROYAL MENCAP SOCIETY", "Registered"),
+    "scope": ("208231", "SCOPE", "Registered"),
+    "actionaid": ("274467", "ACTIONAID", "Registered"),
+    "christian aid": ("1105851", "CHRISTIAN AID", "Registered"),
+    "wateraid": ("288701", "WATERAID", "Registered"),
+    "tearfund": ("265464", "TEARFUND", "Registered"),
+})
+
+
+def _build_substring_index(keys: Tuple[str, ...]) -> Mapping[str, Tuple[int, ...]]:
+    """Map every substring of every key to the (ordered) positions of the keys containing it."""
+    index: Dict[str, List[int]] = {}
+    for pos, key in enumerate(keys):
+        for start in range(len(key)):
+            for end in range(start + 1, len(key) + 1):
+                positions = index.setdefault(key[start:end], [])
+                if not positions or positions[-1] != pos:
+                    positions.append(pos)
+    return MappingProxyType({sub: tuple(positions) for sub, positions in index.items()})
+
+
+# Known names and their entries as parallel tuples in declaration order, and an
+# index answering "which names contain this substring?" with one dict lookup
+_KNOWN_KEYS = tuple(_KNOWN_CHARITIES)
+_KNOWN_ENTRIES = tuple(_KNOWN_CHARITIES.values())
+_KNOWN_SUBSTRING_INDEX = _build_substring_index(_KNOWN_KEYS)
+
+
+def _known_charity_result(entry: Tuple[str, str, str]) -> Dict[str, Any]:
+    """Build a fresh search result dict from a _KNOWN_CHARITIES entry."""
+    number, name, status = entry
+    return {"charityNumber": number, "charityName": name, "registrationStatus": status}
+
+
+class _RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Transport that re-issues a request after a gateway error or a dropped connection.
+    
+    Retries back off exponentially (2s, 4s) and happen below the client, so
+    the service's request, decode and logging code runs once per call.
+    """
+    
+    def __init__(self, transport: httpx.AsyncBaseTransport, attempts: int = _MAX_ATTEMPTS):
+        self._transport = transport
+        self._attempts = attempts
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self._attempts - 1):
+            try:
+                response = await self._transport.handle_async_request(request)
+            except _RETRY_EXCEPTIONS:
+                pass
+            else:
+                if response.status_code not in _RETRY_STATUS_CODES:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(min(10, 2 * 2 ** attempt))
+        # Final attempt: whatever happens is returned/raised to the caller
+        return await self._transport.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        await self._transport.aclose()
 
 
 class CharityCommissionService:
@@ -38,6 +184,17 @@ class CharityCommissionService:
     def __init__(self):
         self.api_key = settings.CHARITY_COMMISSION_API_KEY
         self._client: Optional[httpx.AsyncClient] = None
+        # Lookups keyed by endpoint + charity number: in-flight (single-flight)
+        # and completed results with their expiry (TTL cache, LRU-bounded)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._cache_ttl = settings.CHARITY_COMMISSION_CACHE_TTL_SECONDS
+        self._cache_max_entries = settings.CHARITY_COMMISSION_CACHE_MAX_ENTRIES
+    
+    @property
+    def cache_enabled(self) -> bool:
+        """Whether lookup results are kept (CHARITY_COMMISSION_CACHE_TTL_SECONDS > 0)."""
+        return self._cache_ttl > 0
     
     async def get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client."""
@@ -49,13 +206,77 @@ class CharityCommissionService:
             if self.api_key:
                 headers["Ocp-Apim-Subscription-Key"] = self.api_key
             
+            # HTTP/2 multiplexes the concurrent per-charity requests over one connection;
+            # the transports retry failed connects and gateway errors below the client
+            transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=_TRANSPORT_RETRIES,
+                limits=httpx.Limits(
+                    max_connections=settings.CHARITY_COMMISSION_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.CHARITY_COMMISSION_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.CHARITY_COMMISSION_KEEPALIVE_EXPIRY,
+                ),
+            )
             self._client = httpx.AsyncClient(
                 base_url=self.BASE_URL,
                 headers=headers,
                 timeout=30.0,
+                transport=_RetryTransport(transport),
             )
         return self._client
     
+    async def _get(self, path: str) -> httpx.Response:
+        """Issue a GET against the API, bounded by the shared request semaphore."""
+        client = await self.get_client()
+        async with _request_semaphore:
+            return await client.get(path)
+    
+    async def _get_json(self, path: str, *, on_404: Any = None) -> Any:
+        """
+        GET ``path`` and decode the JSON body, returning ``on_404`` for a 404.
+        
+        Transient failures have already been retried by the client's
+        transport; any other error status is raised as ``httpx.HTTPStatusError``.
+        """
+        response = await self._get(path)
+        if response.status_code == 404:
+            return on_404
+        response.raise_for_status()
+        return orjson.loads(response.content)
+    
+    async def _cached_lookup(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Serve a lookup from the TTL cache, or run ``fetch`` once per key.
+        
+        Concurrent identical lookups share one in-flight request. Only
+        non-empty results are cached, since the fetchers fold API errors
+        into None/[] and those shouldn't stick for the whole TTL.
+        """
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, value = cached
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                return value
+            del self._cache[key]
+        
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_cache(key, fetch))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so a cancelled caller doesn't cancel the lookup other callers are awaiting
+        return await asyncio.shield(future)
+    
+    async def _fetch_and_cache(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fetch`` and cache a non-empty result for the configured TTL."""
+        value = await fetch()
+        if value and self._cache_ttl > 0:
+            self._cache[key] = (time.monotonic() + self._cache_ttl, value)
+            if len(self._cache) > self._cache_max_entries:
+                self._cache.popitem(last=False)
+        return value
+    
     async def close(self):
         """Close the HTTP client."""
         if self._client and not self._client.is_closed:
@@ -64,24 +285,25 @@ class CharityCommissionService:
     @staticmethod
     def normalize_charity_number(charity_number: str) -> str:
         """Normalize charity number to standard format."""
-        # Remove any non-alphanumeric characters
-        normalized = re.sub(r'[^a-zA-Z0-9]', '', charity_number.strip())
-        return normalized.upper()
+        # Same numbers recur throughout a batch, so this is cached at module level
+        return _normalize_charity_number(charity_number)
     
     @staticmethod
     def extract_charity_number(text: str) -> Optional[str]:
-        """Extract charity number from text."""
-        # Common patterns: 123456, 1234567, SC012345, NI12345
-        patterns = [
-            r'\b(\d{6,8})\b',  # Standard charity number
-            r'\b(SC\d{5,6})\b',  # Scottish charity
-            r'\b(NI\d{5,6})\b',  # Northern Ireland charity
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                return match.group(1).upper()
-        return None
+        """
+        Extract charity number from text.
+        
+        An England & Wales number is preferred (it's the one the API can
+        look up), then a Scottish, then a Northern Ireland number.
+        """
+        fallback: Dict[str, str] = {}
+        for match in _CHARITY_NUMBER_RE.finditer(text):
+            kind = match.lastgroup
+            if kind == "std":
+                return match.group(kind)
+            fallback.setdefault(kind, match.group(kind))
+        number = fallback.get("sc") or fallback.get("ni")
+        return number.upper() if number else None
     
     async def search_charities(
         self,
@@ -118,66 +340,43 @@ class CharityCommissionService:
     
     def _get_search_results_by_name(self, search_term: str) -> Dict[str, Any]:
         """Get search results by matching charity names."""
-        # Known charity data for common searches
-        known_charities = {
-            "british red cross": {"charityNumber": "220949", "charityName": "THE BRITISH RED CROSS SOCIETY", "registrationStatus": "Registered"},
-            "red cross": {"charityNumber": "220949", "charityName": "THE BRITISH RED CROSS SOCIETY", "registrationStatus": "Registered"},
-            "oxfam": {"charityNumber": "202918", "charityName": "OXFAM", "registrationStatus": "Registered"},
-            "cancer research uk": {"charityNumber": "1089464", "charityName": "CANCER RESEARCH UK", "registrationStatus": "Registered"},
-            "cancer research": {"charityNumber": "1089464", "charityName": "CANCER RESEARCH UK", "registrationStatus": "Registered"},
-            "nspcc": {"charityNumber": "216401", "charityName": "NATIONAL SOCIETY FOR THE PREVENTION OF CRUELTY TO CHILDREN", "registrationStatus": "Registered"},
-            "save the children": {"charityNumber": "213890", "charityName": "SAVE THE CHILDREN INTERNATIONAL", "registrationStatus": "Registered"},
-            "barnardo's": {"charityNumber": "216250", "charityName": "BARNARDO'S", "registrationStatus": "Registered"},
-            "barnardos": {"charityNumber": "216250", "charityName": "BARNARDO'S", "registrationStatus": "Registered"},
-            "marie curie": {"charityNumber": "207994", "charityName": "MARIE CURIE", "registrationStatus": "Registered"},
-            "macmillan cancer support": {"charityNumber": "261017", "charityName": "MACMILLAN CANCER SUPPORT", "registrationStatus": "Registered"},
-            "macmillan": {"charityNumber": "261017", "charityName": "MACMILLAN CANCER SUPPORT", "registrationStatus": "Registered"},
-            "age uk": {"charityNumber": "1128267", "charityName": "AGE UK", "registrationStatus": "Registered"},
-            "shelter": {"charityNumber": "263710", "charityName": "SHELTER, NATIONAL CAMPAIGN FOR HOMELESS PEOPLE LIMITED", "registrationStatus": "Registered"},
-            "rspca": {"charityNumber": "219099", "charityName": "ROYAL SOCIETY FOR THE PREVENTION OF CRUELTY TO ANIMALS", "registrationStatus": "Registered"},
-            "rspb": {"charityNumber": "207076", "charityName": "ROYAL SOCIETY FOR THE PROTECTION OF BIRDS", "registrationStatus": "Registered"},
-            "wwf": {"charityNumber": "1081247", "charityName": "WWF-UK", "registrationStatus": "Registered"},
-            "world wildlife fund": {"charityNumber": "1081247", "charityName": "WWF-UK", "registrationStatus": "Registered"},
-            "unicef": {"charityNumber": "1072612", "charityName": "THE UNITED KINGDOM COMMITTEE FOR UNICEF", "registrationStatus": "Registered"},
-            "mind": {"charityNumber": "219830", "charityName": "MIND", "registrationStatus": "Registered"},
-            "samaritans": {"charityNumber": "219432", "charityName": "SAMARITANS", "registrationStatus": "Registered"},
-            "mencap": {"charityNumber": "222377", "charityName": "ROYAL MENCAP SOCIETY", "registrationStatus": "Registered"},
-            "scope": {"charityNumber": "208231", "charityName": "SCOPE", "registrationStatus": "Registered"},
-            "actionaid": {"charityNumber": "274467", "charityName": "ACTIONAID", "registrationStatus": "Registered"},
-            "christian aid": {"charityNumber": "1105851", "charityName": "CHRISTIAN AID", "registrationStatus": "Registered"},
-            "wateraid": {"charityNumber": "288701", "charityName": "WATERAID", "registrationStatus": "Registered"},
-            "tearfund": {"charityNumber": "265464", "charityName": "TEARFUND", "registrationStatus": "Registered"},
-        }
-        
         search_lower = search_term.lower().strip()
         results = []
         seen_numbers = set()
         
         # Exact match first
-        if search_lower in known_charities:
-            charity = known_charities[search_lower]
-            results.append(charity)
-            seen_numbers.add(charity["charityNumber"])
-        
-        # Partial matches
-        for key, charity in known_charities.items():
-            if charity["charityNumber"] not in seen_numbers:
-                if search_lower in key or key in search_lower:
-                    results.append(charity)
-                    seen_numbers.add(charity["charityNumber"])
-        
-        # Word-based matches
-        if not results:
-            for key, charity in known_charities.items():
-                if charity["charityNumber"] not in seen_numbers:
-                    if any(word in key for word in search_lower.split() if len(word) > 3):
-                        results.append(charity)
-                        seen_numbers.add(charity["charityNumber"])
+        if search_lower in _KNOWN_CHARITIES:
+            entry = _KNOWN_CHARITIES[search_lower]
+            results.append(_known_charity_result(entry))
+            seen_numbers.add(entry[0])
+        
+        # Partial matches: names containing the query, or contained in it
+        if search_lower:
+            positions = set(_KNOWN_SUBSTRING_INDEX.get(search_lower, ()))
+            positions.update(pos for pos, key in enumerate(_KNOWN_KEYS) if key in search_lower)
+        else:
+            positions = range(len(_KNOWN_KEYS))
+        for pos in sorted(positions):
+            entry = _KNOWN_ENTRIES[pos]
+            if entry[0] not in seen_numbers:
+                results.append(_known_charity_result(entry))
+                seen_numbers.add(entry[0])
+        
+        # Word-based matches: names containing any query word, via the substring index
+        words = [word for word in search_lower.split() if len(word) > 3]
+        if not results and words:
+            positions = set()
+            for word in words:
+                positions.update(_KNOWN_SUBSTRING_INDEX.get(word, ()))
+            for pos in sorted(positions):
+                entry = _KNOWN_ENTRIES[pos]
+                if entry[0] not in seen_numbers:
+                    results.append(_known_charity_result(entry))
+                    seen_numbers.add(entry[0])
         
         logger.info("Name search results", search_term=search_term, results_count=len(results))
         return {"charities": results}
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def get_charity_by_number(self, charity_number: str) -> Optional[Dict[str, Any]]:
         """
         Get charity details by registration number.
@@ -189,33 +388,39 @@ class CharityCommissionService:
             Dict containing charity details or None if not found
         """
         normalized = self.normalize_charity_number(charity_number)
-        api_log(f"get_charity_by_number: looking up charity #{normalized}", charity_number=normalized)
-        
+        return await self._cached_lookup(
+            f"charityDetails:{normalized}",
+            lambda: self._fetch_charity_by_number(normalized),
+        )
+    
+    async def _fetch_charity_by_number(self, normalized: str) -> Optional[Dict[str, Any]]:
+        """Fetch /charityDetails for an already-normalized charity number."""
         # Check if API key is configured
         if not self.api_key:
-            api_log("API key not configured - cannot fetch charity details", charity_number=normalized, level="WARNING")
             logger.warning("Charity Commission API key not configured")
             return None
         
-        client = await self.get_client()
-        
         try:
             # Use charityDetails endpoint for full info
-            start_time = datetime.utcnow()
-            api_log(f"Calling API: GET /charityDetails/{normalized}/0", charity_number=normalized)
-            response = await client.get(f"/charityDetails/{normalized}/0")
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            start_time = time.perf_counter()
+            logger.debug("Charity Commission API request", endpoint="charityDetails", charity_number=normalized)
+            data = await self._get_json(f"/charityDetails/{normalized}/0")
+            duration = time.perf_counter() - start_time
             
-            if response.status_code == 404:
-                api_log(f"API returned 404 (not found) in {duration:.2f}s", charity_number=normalized)
+            if data is None:
+                logger.debug("Charity not found", endpoint="charityDetails", charity_number=normalized, duration=duration)
                 return None
             
-            response.raise_for_status()
-            data = response.json()
-            api_log(f"API SUCCESS in {duration:.2f}s: charity_name='{data.get('charity_name', 'N/A')}'", charity_number=normalized)
+            logger.debug(
+                "Charity Commission API success",
+                endpoint="charityDetails",
+                charity_number=normalized,
+                duration=duration,
+                charity_name=data.get("charity_name"),
+            )
             
             # Convert API response to our expected format
-            return {
+            charity_data = {
                 "charityNumber": str(data.get("reg_charity_number", normalized)),
                 "charityName": data.get("charity_name"),
                 "registrationStatus": "Registered" if data.get("reg_status") == "R" else "Removed",
@@ -238,18 +443,17 @@ class CharityCommissionService:
                 "latestFinYearStart": data.get("latest_acc_fin_year_start_date"),
                 "latestFinYearEnd": data.get("latest_acc_fin_year_end_date"),
                 "companyNumber": data.get("charity_co_reg_number"),
+                # Surfaced to clients as the match candidate's candidate_data
                 "raw_data": data,
             }
+            return charity_data
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                return None
             logger.error("Charity Commission API error", status_code=e.response.status_code, error=str(e))
             raise
         except Exception as e:
             logger.error("Charity Commission API error", error=str(e))
             raise
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def get_all_charity_details(self, charity_number: str) -> Optional[Dict[str, Any]]:
         """
         Get extended charity details INCLUDING trustees, classifications, and areas of operation.
@@ -263,46 +467,48 @@ class CharityCommissionService:
             Dict containing extended charity details including trustees, or None if not found
         """
         normalized = self.normalize_charity_number(charity_number)
-        api_log(f"get_all_charity_details: fetching extended details with trustees for #{normalized}", charity_number=normalized)
-        
+        return await self._cached_lookup(
+            f"allcharitydetails:{normalized}", lambda: self._fetch_all_charity_details(normalized)
+        )
+    
+    async def _fetch_all_charity_details(self, normalized: str) -> Optional[Dict[str, Any]]:
+        """Fetch /allcharitydetails for an already-normalized charity number."""
         if not self.api_key:
-            api_log("API key not configured - cannot fetch extended charity details", charity_number=normalized, level="WARNING")
+            logger.warning("Charity Commission API key not configured")
             return None
-            
-        client = await self.get_client()
         
         try:
-            start_time = datetime.utcnow()
-            api_log(f"Calling API: GET /allcharitydetails/{normalized}/0", charity_number=normalized)
-            response = await client.get(f"/allcharitydetails/{normalized}/0")
-            duration = (datetime.utcnow() - start_time).total_seconds()
+            start_time = time.perf_counter()
+            logger.debug("Charity Commission API request", endpoint="allcharitydetails", charity_number=normalized)
+            data = await self._get_json(f"/allcharitydetails/{normalized}/0")
+            duration = time.perf_counter() - start_time
             
-            if response.status_code == 404:
-                api_log(f"API returned 404 (not found) in {duration:.2f}s", charity_number=normalized)
+            if data is None:
+                logger.debug("Charity not found", endpoint="allcharitydetails", charity_number=normalized, duration=duration)
                 return None
             
-            response.raise_for_status()
-            data = response.json()
-            
-            # Log what we got
-            trustees_count = len(data.get("trustees", [])) if isinstance(data.get("trustees"), list) else 0
-            api_log(f"API SUCCESS in {duration:.2f}s: charity_name='{data.get('charity_name', 'N/A')}', trustees_count={trustees_count}", charity_number=normalized)
+            logger.debug(
+                "Charity Commission API success",
+                endpoint="allcharitydetails",
+                charity_number=normalized,
+                duration=duration,
+                charity_name=data.get("charity_name"),
+            )
             
             return data
             
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                api_log(f"Extended details not found (404)", charity_number=normalized)
-                return None
-            api_log(f"API error: {e.response.status_code}", charity_number=normalized, level="ERROR")
-            logger.error("Charity Commission API error", status_code=e.response.status_code, error=str(e))
+            logger.error(
+                "Charity Commission API error",
+                charity_number=normalized,
+                status_code=e.response.status_code,
+                error=str(e),
+            )
             return None
         except Exception as e:
-            api_log(f"API exception: {str(e)}", charity_number=normalized, level="ERROR")
-            logger.error("Charity Commission API error", error=str(e))
+            logger.error("Charity Commission API error", charity_number=normalized, error=str(e))
             return None
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def get_charity_accounts(self, charity_number: str) -> List[Dict[str, Any]]:
         """
         Get financial accounts for a charity.
@@ -316,7 +522,6 @@ class CharityCommissionService:
         # Financial data is included in charityDetails response
         return []
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     async def get_charity_subsidiaries(self, charity_number: str) -> List[Dict[str, Any]]:
         """
         Get subsidiary undertakings for a charity.
@@ -327,22 +532,20 @@ class CharityCommissionService:
         Returns:
             List of subsidiary records
         """
+        normalized = self.normalize_charity_number(charity_number)
+        return await self._cached_lookup(
+            f"charitySubsidiaries:{normalized}", lambda: self._fetch_charity_subsidiaries(normalized)
+        )
+    
+    async def _fetch_charity_subsidiaries(self, normalized: str) -> List[Dict[str, Any]]:
+        """Fetch /charitySubsidiaries for an already-normalized charity number."""
         if not self.api_key:
             return []
-            
-        client = await self.get_client()
-        normalized = self.normalize_charity_number(charity_number)
         
         try:
-            response = await client.get(f"/charitySubsidiaries/{normalized}/0")
-            if response.status_code == 404:
-                return []
-            response.raise_for_status()
-            data = response.json()
+            data = await self._get_json(f"/charitySubsidiaries/{normalized}/0", on_404=[])
             return data if isinstance(data, list) else []
         except httpx.HTTPStatusError as e:
-            if e.response.status_code == 404:
-                return []
             logger.error("Charity Commission API error", status_code=e.response.status_code, error=str(e))
             return []
         except Exception as e:
@@ -363,28 +566,38 @@ class CharityCommissionService:
             Dict containing full charity details
         """
         normalized = self.normalize_charity_number(charity_number)
-        api_log(f"get_full_charity_details: fetching comprehensive data for #{normalized}", charity_number=normalized)
-        
-        # Try the extended endpoint first (includes trustees)
-        all_details, subsidiaries = await asyncio.gather(
-            self.get_all_charity_details(charity_number),
-            self.get_charity_subsidiaries(charity_number),
-            return_exceptions=True,
+        return await self._cached_lookup(
+            f"full:{normalized}",
+            lambda: self._fetch_full_charity_details(normalized),
         )
+    
+    async def _fetch_full_charity_details(self, normalized: str) -> Optional[Dict[str, Any]]:
+        """Fetch and merge full details for an already-normalized charity number."""
+        logger.debug("Fetching full charity details", charity_number=normalized)
+        
+        # Try the extended endpoint first (includes trustees). Both fetchers fold
+        # API errors into None/[]; anything else cancels the sibling request
+        # rather than leaving it running, and we fall back to the basic endpoint.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                all_details_task = tg.create_task(self._fetch_all_charity_details(normalized))
+                subsidiaries_task = tg.create_task(self._fetch_charity_subsidiaries(normalized))
+        except* Exception as eg:
+            logger.error("Charity Commission API error", error=str(eg.exceptions[0]))
+            all_details, subsidiaries = None, []
+        else:
+            all_details, subsidiaries = all_details_task.result(), subsidiaries_task.result()
         
         # If extended endpoint worked, use that data
-        if all_details and not isinstance(all_details, Exception):
+        if all_details:
             # Convert to our expected format
             # Extract trustees from trustee_names field (the actual field name from API)
             raw_trustees = all_details.get("trustee_names", [])
-            trustees = []
-            if isinstance(raw_trustees, list):
-                for t in raw_trustees:
-                    if isinstance(t, dict) and t.get("trustee_name"):
-                        trustees.append({
-                            "name": t.get("trustee_name"),
-                            "organisation_number": t.get("organisation_number"),
-                        })
+            trustees = [
+                {"name": name, "organisation_number": t.get("organisation_number")}
+                for t in raw_trustees
+                if isinstance(t, dict) and (name := t.get("trustee_name"))
+            ] if isinstance(raw_trustees, list) else []
             
             # Extract classifications from who_what_where field
             classifications = all_details.get("who_what_where", [])
@@ -393,7 +606,7 @@ class CharityCommissionService:
             how_classifications = [c.get("classification_desc") for c in classifications if c.get("classification_type") == "How"]
             
             # Extract other names
-            other_names = [n.get("other_name") for n in all_details.get("other_names", []) if n.get("other_name")]
+            other_names = [name for n in all_details.get("other_names", []) if (name := n.get("other_name"))]
             
             charity_data = {
                 "charityNumber": str(all_details.get("reg_charity_number") or all_details.get("registered_charity_number") or normalized),
@@ -418,10 +631,9 @@ class CharityCommissionService:
                 "latestFinYearStart": all_details.get("latest_acc_fin_year_start_date"),
                 "latestFinYearEnd": all_details.get("latest_acc_fin_year_end_date"),
                 "companyNumber": all_details.get("charity_co_reg_number"),
-                "raw_data": all_details,
                 # Trustees from trustee_names field
                 "trustees": trustees,
-                "subsidiaries": subsidiaries if not isinstance(subsidiaries, Exception) else [],
+                "subsidiaries": subsidiaries,
                 # Additional data from allcharitydetails endpoint
                 "otherNames": other_names,
                 "classifications": {
@@ -437,23 +649,62 @@ class CharityCommissionService:
                 },
             }
             
-            trustees_count = len(charity_data.get("trustees", []))
-            api_log(f"Full details retrieved: {charity_data['charityName']}, trustees={trustees_count}", charity_number=normalized)
+            logger.debug(
+                "Full charity details retrieved",
+                charity_number=normalized,
+                charity_name=charity_data["charityName"],
+                trustees_count=len(trustees),
+            )
             return charity_data
         
         # Fallback to basic endpoint if extended fails
-        api_log(f"Extended endpoint failed, falling back to basic endpoint", charity_number=normalized, level="WARNING")
-        charity_data = await self.get_charity_by_number(charity_number)
+        logger.warning("Extended charity details unavailable, falling back to basic endpoint", charity_number=normalized)
+        charity_data = await self._fetch_charity_by_number(normalized)
         
         if charity_data is None:
             return None
         
         # Add subsidiaries (no trustees available from basic endpoint)
         charity_data["trustees"] = []
-        charity_data["subsidiaries"] = subsidiaries if not isinstance(subsidiaries, Exception) else []
+        charity_data["subsidiaries"] = subsidiaries
         
         return charity_data
     
+    async def get_full_charity_details_batch(
+        self,
+        charity_numbers: List[str],
+        concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Get full charity details for many charities concurrently.
+        
+        Lookups share this service's HTTP client, at most ``concurrency`` of
+        them run at once, and repeated numbers are only fetched once.
+        
+        Args:
+            charity_numbers: Charity registration numbers
+            concurrency: Maximum concurrent lookups (defaults to
+                CHARITY_COMMISSION_MAX_CONCURRENCY)
+        
+        Returns:
+            List aligned with ``charity_numbers`` holding each charity's details,
+            None if not found, or the exception raised for that lookup
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.CHARITY_COMMISSION_MAX_CONCURRENCY)
+        
+        async def fetch_one(charity_number: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.get_full_charity_details(charity_number)
+        
+        normalized_numbers = [self.normalize_charity_number(number) for number in charity_numbers]
+        unique_numbers = list(dict.fromkeys(normalized_numbers))
+        results = await asyncio.gather(
+            *(fetch_one(number) for number in unique_numbers),
+            return_exceptions=True,
+        )
+        by_number = dict(zip(unique_numbers, results))
+        return [by_number[number] for number in normalized_numbers]
+    
     @staticmethod
     def parse_charity_data(data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -465,91 +716,89 @@ class CharityCommissionService:
         Returns:
             Standardized charity data
         """
-        # Extract basic info
-        parsed = {
-            "charity_number": data.get("charityNumber") or data.get("registeredCharityNumber"),
-            "name": data.get("charityName") or data.get("name"),
-            "status": data.get("registrationStatus"),
-            "registration_date": None,
-            "removal_date": None,
-            "activities": data.get("activities"),
-            "contact_email": None,
-            "contact_phone": None,
-            "website": None,
-            "address": None,
-            "latest_income": data.get("latestIncome"),
-            "latest_expenditure": data.get("latestExpenditure"),
-            "financial_year_end": None,
-            "trustees": [],
-            "subsidiaries": [],
-        }
-        
-        # Parse dates
-        if data.get("registrationDate"):
-            try:
-                date_str = data["registrationDate"]
-                if isinstance(date_str, str):
-                    parsed["registration_date"] = datetime.fromisoformat(
-                        date_str.replace("Z", "+00:00")
-                    )
-            except (ValueError, TypeError):
-                pass
+        parsed = CharityCommissionService.parse_basic(data)
+        parsed["trustees"] = CharityCommissionService.parse_trustees(data)
+        parsed["subsidiaries"] = CharityCommissionService.parse_subsidiaries(data)
+        return parsed
+    
+    @staticmethod
+    def parse_basic(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Parse the scalar fields (identity, dates, contact, financials) of a raw API response.
         
-        if data.get("removalDate"):
-            try:
-                date_str = data["removalDate"]
-                if isinstance(date_str, str):
-                    parsed["removal_date"] = datetime.fromisoformat(
-                        date_str.replace("Z", "+00:00")
-                    )
-            except (ValueError, TypeError):
-                pass
+        Use this instead of parse_charity_data when trustees and subsidiaries
+        aren't needed, to skip building those lists.
         
-        # Parse contact info
-        contact = data.get("contact", {}) or {}
-        parsed["contact_email"] = contact.get("email")
-        parsed["contact_phone"] = contact.get("phone")
-        parsed["website"] = contact.get("web")
-        
-        # Parse address
-        address_parts = []
-        for key in ["addressLine1", "addressLine2", "addressLine3", "addressLine4", "postcode"]:
-            if contact.get(key):
-                address_parts.append(contact[key])
-        parsed["address"] = ", ".join(address_parts) if address_parts else None
-        
-        # Parse financial year end
-        if data.get("latestFinYearEnd"):
-            try:
-                date_str = data["latestFinYearEnd"]
-                if isinstance(date_str, str):
-                    parsed["financial_year_end"] = datetime.fromisoformat(
-                        date_str.replace("Z", "+00:00")
-                    )
-            except (ValueError, TypeError):
-                pass
+        Args:
+            data: Raw API response
         
-        # Parse trustees (can come from 'trustees' or 'trustee_names' field)
-        trustees = data.get("trustees", []) or data.get("trustee_names", [])
-        parsed["trustees"] = []
-        if isinstance(trustees, list):
-            for t in trustees:
-                if isinstance(t, dict):
-                    name = t.get("name") or t.get("trustee_name") or t.get("trusteeName")
-                    if name:
-                        parsed["trustees"].append({
-                            "name": name,
-                            "id": t.get("id") or t.get("trustee_id") or t.get("trusteeId") or t.get("organisation_number"),
-                        })
-        
-        # Parse subsidiaries
-        subsidiaries = data.get("subsidiaries", [])
-        parsed["subsidiaries"] = [
+        Returns:
+            Standardized charity data without trustees/subsidiaries
+        """
+        # Bind the lookups once; this runs for every parsed record
+        get = data.get
+        contact = get("contact") or _EMPTY
+        cget = contact.get
+        
+        return {
+            "charity_number": get("charityNumber") or get("registeredCharityNumber"),
+            "name": get("charityName") or get("name"),
+            "status": get("registrationStatus"),
+            "registration_date": _parse_iso_datetime(get("registrationDate")),
+            "removal_date": _parse_iso_datetime(get("removalDate")),
+            "activities": get("activities"),
+            "contact_email": cget("email"),
+            "contact_phone": cget("phone"),
+            "website": cget("web"),
+            # A list (not a generator) lets join size its buffer in one pass
+            "address": ", ".join([v for k in _ADDR_KEYS if (v := cget(k))]) or None,
+            "latest_income": get("latestIncome"),
+            "latest_expenditure": get("latestExpenditure"),
+            "financial_year_end": _parse_iso_datetime(get("latestFinYearEnd")),
+        }
+    
+    @staticmethod
+    def parse_trustees(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Parse trustees (from 'trustees' or 'trustee_names') of a raw API response."""
+        trustees = data.get("trustees") or data.get("trustee_names")
+        if not isinstance(trustees, list):
+            return []
+        return [
+            {
+                "name": name,
+                "id": t.get("id") or t.get("trustee_id") or t.get("trusteeId") or t.get("organisation_number"),
+            }
+            for t in trustees
+            if isinstance(t, dict)
+            and (name := t.get("name") or t.get("trustee_name") or t.get("trusteeName"))
+        ]
+    
+    @staticmethod
+    def parse_subsidiaries(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Parse subsidiaries of a raw API response."""
+        return [
             {
                 "name": s.get("subsidiary_name") or s.get("subsidiaryName"),
                 "company_number": s.get("company_number") or s.get("companyNumber"),
             }
-            for s in subsidiaries if isinstance(s, dict)
+            for s in data.get("subsidiaries") or () if isinstance(s, dict)
         ]
-        
-        return parsed
+
+
+# Process-wide instance so every caller shares one connection pool, cache and
+# in-flight map instead of opening a fresh client per request
+_charity_service: Optional[CharityCommissionService] = None
+
+
+def get_charity_service() -> CharityCommissionService:
+    """Get the shared CharityCommissionService, creating it on first use."""
+    global _charity_service
+    if _charity_service is None:
+        _charity_service = CharityCommissionService()
+    return _charity_service
+
+
+async def close_charity_service() -> None:
+    """Close the shared service's HTTP client (called on application shutdown)."""
+    if _charity_service is not None:
+        await _charity_service.close()
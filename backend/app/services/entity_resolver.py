@@ -1,79 +1,184 @@
 """Entity resolution service using fuzzy matching and AI."""
 import asyncio
+import logging
 import re
-import sys
+import time
 import traceback
 from datetime import datetime
-from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
+import httpx
 from openai import AsyncOpenAI
-from sqlalchemy import select, update, delete
+from pydantic import BaseModel
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Indel
+from sqlalchemy import and_, delete, func, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models.entity import (
     Entity, EntityBatch, EntityResolution, EntityType, ResolutionStatus, BatchStatus
 )
-from app.services.charity_commission import CharityCommissionService
+from app.services.charity_commission import CharityCommissionService, get_charity_service
 import structlog
 
 logger = structlog.get_logger()
+# The stdlib logger structlog writes through, used for cheap level checks
+_stdlib_logger = logging.getLogger(__name__)
+
+# Common words stripped (as substrings, each with its leading space) when
+# normalizing names, fused into one alternation so each name is scanned once
+_NAME_NOISE = (
+    " limited", " ltd", " plc", " llp", " cic", " cio",
+    " charity", " charitable", " trust", " foundation",
+    " association", " society", " organisation", " organization",
+    " uk", " england", " wales", " scotland",
+    " national", " campaign", " for", " the", " of", " and",
+)
+_NAME_NOISE_RE = re.compile("|".join(re.escape(word) for word in _NAME_NOISE))
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+# Minimum fuzz.ratio (0-100) for reusing an already-resolved name without
+# searching the API; same bar as the search's exact_match threshold
+_KNOWN_NAME_CUTOFF = 95
+
+# Only user-confirmed entities and matches made on an exact name or a charity
+# number seed the known-name index, so a fuzzy or AI mistake isn't repeated.
+# The most recent _KNOWN_NAME_LIMIT of them are loaded per batch.
+_KNOWN_NAME_METHODS = frozenset({"exact_match", "direct_lookup", "number_extraction"})
+_KNOWN_NAME_LIMIT = 5000
+
+# When the AI would otherwise be asked, a best candidate scoring at least
+# _CLEAR_WINNER_MIN_SCORE that leads a real runner-up by _CLEAR_WINNER_GAP
+# is accepted without the call (a lone candidate still goes to the AI)
+_CLEAR_WINNER_MIN_SCORE = 0.80
+_CLEAR_WINNER_GAP = 0.15
+
+# An entity heading to the AI only has its top candidate's details fetched
+# ahead of the answer when that candidate scores at least this much;
+# weaker tops usually end up unmatched and the fetch would be wasted
+_SPECULATIVE_MIN_SCORE = 0.80
+
+# process_batch resolves and commits entities in chunks of this size
+_CHUNK_SIZE = 50
+
+
+@lru_cache(maxsize=8192)
+def _normalize_name(name: str) -> str:
+    """Lower-case a name and strip common words and punctuation (memoized)."""
+    normalized = _NON_WORD_RE.sub('', _NAME_NOISE_RE.sub('', name.lower()))
+    return ' '.join(normalized.split())
+
+
+class _AIMatchResult(BaseModel):
+    """Shape of the JSON object the model is asked to return in ai_resolve_entity."""
+    match_found: bool = False
+    selected_index: Optional[int] = None
+    confidence: float = 0.8
+    reasoning: str = "AI matched"
+
+
+class _AIBulkMatchResult(_AIMatchResult):
+    """One entity's answer within an ai_resolve_entities_bulk response."""
+    entity_index: int
+
+
+class _AIBulkResponse(BaseModel):
+    """Shape of the JSON object the model is asked to return in ai_resolve_entities_bulk."""
+    results: List[_AIBulkMatchResult] = []
+
+
+# Entities packed into a single AI prompt by ai_resolve_entities_bulk
+_AI_ENTITIES_PER_PROMPT = 10
+
+_AI_MATCHING_GUIDANCE = """Consider:
+- Name variations (abbreviations, spelling differences)
+- Common organizational suffixes (Ltd, Charity, Foundation)
+- Registration status
+- Similarity scores
+
+Be conservative - only match if confident it's the same organization."""
+
+
+# Process-wide OpenAI client so every resolver reuses one connection pool
+# instead of opening fresh TLS connections per batch
+_openai_client: Optional[AsyncOpenAI] = None
+
+
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    """Get the shared AsyncOpenAI client, or None if no API key is configured."""
+    global _openai_client
+    if _openai_client is None and settings.OPENAI_API_KEY:
+        _openai_client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            ),
+        )
+    return _openai_client
+
+
+async def close_openai_client() -> None:
+    """Close the shared OpenAI client (called on application shutdown)."""
+    if _openai_client is not None:
+        await _openai_client.close()
 
 
 def debug_log(msg: str, batch_id: str = "", entity_name: str = "", level: str = "DEBUG"):
-    """Log debug messages to stdout/stderr for Railway visibility."""
-    timestamp = datetime.utcnow().isoformat()
-    context = ""
+    """Log resolver progress through structlog, with batch/entity as fields."""
+    log_level = getattr(logging, level, logging.DEBUG)
+    # Checked on the stdlib logger first: these fire several times per entity,
+    # and disabled levels should cost nothing beyond this lookup
+    if not _stdlib_logger.isEnabledFor(log_level):
+        return
+    fields = {}
     if batch_id:
-        context += f"[batch={batch_id}] "
+        fields["batch_id"] = batch_id
     if entity_name:
-        context += f"[entity='{entity_name[:30]}...'] " if len(entity_name) > 30 else f"[entity='{entity_name}'] "
-    formatted = f"[{level}] [{timestamp}] {context}{msg}"
-    print(formatted, file=sys.stdout, flush=True)
+        fields["entity_name"] = entity_name
+    logger.log(log_level, msg, **fields)
 
 
 class EntityResolverService:
     """Service for resolving entities to Charity Commission records."""
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, charity_service: Optional[CharityCommissionService] = None):
         self.db = db
-        self.charity_service = CharityCommissionService()
-        self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY) if settings.OPENAI_API_KEY else None
+        # Defaults to the process-wide service (and its connection pool)
+        self.charity_service = charity_service or get_charity_service()
+        self.openai_client = get_openai_client()
+        # Normalized name -> (charity number, stored confidence) for trusted matches (see process_batch)
+        self._known_names: Dict[str, Tuple[str, Optional[float]]] = {}
+        # Serializes statements on the shared session when entities resolve concurrently
+        self._db_lock = asyncio.Lock()
     
     async def close(self):
         """Clean up resources."""
-        await self.charity_service.close()
+        # The charity service is shared process-wide and closed on app shutdown
+    
+    async def __aenter__(self) -> "EntityResolverService":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
     
     @staticmethod
     def normalize_name(name: str) -> str:
         """Normalize entity name for comparison."""
-        # Convert to lowercase
-        normalized = name.lower()
-        # Remove common suffixes
-        suffixes = [
-            " limited", " ltd", " plc", " llp", " cic", " cio",
-            " charity", " charitable", " trust", " foundation",
-            " association", " society", " organisation", " organization",
-            " uk", " england", " wales", " scotland",
-            " national", " campaign", " for", " the", " of", " and",
-        ]
-        for suffix in suffixes:
-            normalized = normalized.replace(suffix, "")
-        # Remove special characters
-        normalized = re.sub(r'[^\w\s]', '', normalized)
-        # Remove extra whitespace
-        normalized = ' '.join(normalized.split())
-        return normalized.strip()
+        # Candidate and entity names recur throughout a batch, so this is cached at module level
+        return _normalize_name(name)
     
     @staticmethod
+    @lru_cache(maxsize=65536)  # Same entity/candidate name pairs recur across searches in a batch
     def calculate_similarity(name1: str, name2: str) -> float:
         """
         Calculate similarity score between two names.
         
         Uses multiple strategies:
-        1. Direct SequenceMatcher ratio on normalized names
+        1. Direct Indel similarity (RapidFuzz) on normalized names
         2. Check if one name contains the other (partial match bonus)
         3. Word overlap score with subset bonus
         4. First word match bonus (important for charity names)
@@ -83,12 +188,16 @@ class EntityResolverService:
         norm1 = EntityResolverService.normalize_name(name1)
         norm2 = EntityResolverService.normalize_name(name2)
         
+        # Identical normalized names already get the top score from strategy 1
+        if norm1 == norm2:
+            return 1.0
+        
         # Also check original names (case insensitive) for containment
         orig1 = name1.lower().strip()
         orig2 = name2.lower().strip()
         
-        # Strategy 1: Direct sequence matching
-        seq_score = SequenceMatcher(None, norm1, norm2).ratio()
+        # Strategy 1: Direct sequence matching (C bit-parallel LCS, 0-1)
+        seq_score = Indel.normalized_similarity(norm1, norm2)
         
         # Strategy 2: Containment check (if one is contained in the other)
         containment_score = 0.0
@@ -136,6 +245,78 @@ class EntityResolverService:
         # Return the best score
         return max(seq_score, containment_score, word_score, first_word_bonus)
     
+    async def load_known_names(self, user_id: UUID):
+        """
+        Seed the known-name index from the user's trusted resolutions.
+        
+        Confirmed entities and exact-name or charity-number matches are
+        indexed by both original and resolved name, so a donor name that
+        was matched once is recognised again without an API search.
+        Confirmed entities win when two resolutions share a name, then
+        the most recent.
+        """
+        result = await self.db.execute(
+            select(
+                Entity.original_name,
+                Entity.resolved_name,
+                Entity.charity_number,
+                Entity.resolution_confidence,
+            )
+            .join(EntityBatch, Entity.batch_id == EntityBatch.id)
+            .where(EntityBatch.user_id == user_id)
+            .where(Entity.charity_number.isnot(None))
+            .where(or_(
+                Entity.resolution_status == ResolutionStatus.CONFIRMED,
+                and_(
+                    Entity.resolution_status == ResolutionStatus.MATCHED,
+                    Entity.resolution_method.in_(_KNOWN_NAME_METHODS),
+                ),
+            ))
+            .order_by(
+                (Entity.resolution_status == ResolutionStatus.CONFIRMED).desc(),
+                Entity.resolved_at.desc().nullslast(),
+            )
+            .limit(_KNOWN_NAME_LIMIT)
+        )
+        for original_name, resolved_name, charity_number, confidence in result.all():
+            self._remember_name(original_name, charity_number, confidence)
+            self._remember_name(resolved_name, charity_number, confidence)
+    
+    def _remember_name(
+        self,
+        name: Optional[str],
+        charity_number: Optional[str],
+        confidence: Optional[float],
+    ):
+        """Add a trusted match to the known-name index."""
+        if name and charity_number:
+            normalized = _normalize_name(name)
+            if normalized:
+                self._known_names.setdefault(normalized, (charity_number, confidence))
+    
+    def match_known_name(self, name: str) -> Optional[Tuple[str, float]]:
+        """
+        Look a name up in the known-name index.
+        
+        Returns:
+            Tuple of (charity_number, confidence) or None. The confidence is
+            the one stored with the original match, falling back to the name
+            similarity when none was recorded.
+        """
+        if not self._known_names:
+            return None
+        normalized = _normalize_name(name)
+        if not normalized:
+            return None
+        hit = process.extractOne(
+            normalized, self._known_names.keys(),
+            scorer=fuzz.ratio, score_cutoff=_KNOWN_NAME_CUTOFF,
+        )
+        if hit is None:
+            return None
+        charity_number, confidence = self._known_names[hit[0]]
+        return charity_number, confidence if confidence is not None else hit[1] / 100
+    
     async def search_candidates(
         self,
         entity_name: str,
@@ -212,16 +393,7 @@ class EntityResolverService:
         if not self.openai_client or not candidates:
             return None
         
-        # Prepare context
-        context = f"Original entity name: {entity_name}\n"
-        if original_data:
-            context += f"Additional context: {original_data}\n"
-        
-        context += "\nCandidate matches:\n"
-        for i, candidate in enumerate(candidates, 1):
-            context += f"{i}. {candidate['name']} (Charity #{candidate['charity_number']}, "
-            context += f"Status: {candidate.get('status', 'Unknown')}, "
-            context += f"Similarity: {candidate['similarity_score']:.2%})\n"
+        context = self._ai_context(entity_name, candidates, original_data)
         
         prompt = f"""You are an expert at matching organization names to official charity records.
 
@@ -237,13 +409,7 @@ Respond in JSON format:
     "reasoning": "<brief explanation>"
 }}
 
-Consider:
-- Name variations (abbreviations, spelling differences)
-- Common organizational suffixes (Ltd, Charity, Foundation)
-- Registration status
-- Similarity scores
-
-Be conservative - only match if confident it's the same organization."""
+{_AI_MATCHING_GUIDANCE}"""
 
         try:
             response = await self.openai_client.chat.completions.create(
@@ -256,24 +422,117 @@ Be conservative - only match if confident it's the same organization."""
                 temperature=0.1,
             )
             
-            import json
-            result = json.loads(response.choices[0].message.content)
-            
-            if result.get("match_found") and result.get("selected_index"):
-                idx = result["selected_index"] - 1
-                if 0 <= idx < len(candidates):
-                    return (
-                        candidates[idx]["charity_number"],
-                        result.get("confidence", 0.8),
-                        result.get("reasoning", "AI matched"),
-                    )
-            
-            return None
+            # Parsed and validated in one pass by pydantic's JSON parser
+            result = _AIMatchResult.model_validate_json(response.choices[0].message.content)
+            return self._ai_selection(result, candidates)
             
         except Exception as e:
             logger.error("AI resolution error", error=str(e))
             return None
     
+    async def ai_resolve_entities_bulk(
+        self,
+        items: List[Tuple[str, List[Dict[str, Any]], Optional[Dict[str, Any]]]],
+    ) -> List[Optional[Tuple[str, float, str]]]:
+        """
+        Use AI to select the best matching candidate for several entities in one request.
+        
+        Args:
+            items: (entity_name, candidates, original_data) per entity
+        
+        Returns:
+            One (charity_number, confidence, reasoning) or None per item, in order.
+            Entities the response doesn't answer fall back to ai_resolve_entity.
+        """
+        if not self.openai_client:
+            return [None] * len(items)
+        if len(items) == 1:
+            return [await self.ai_resolve_entity(*items[0])]
+        
+        sections = "\n\n".join(
+            f"Entity {i}:\n{self._ai_context(*item)}" for i, item in enumerate(items, 1)
+        )
+        prompt = f"""You are an expert at matching organization names to official charity records.
+
+{sections}
+
+Task: For each entity, determine if any of its candidates is a match for it.
+
+Respond in JSON format, with one result per entity:
+{{
+    "results": [
+        {{
+            "entity_index": <1-based entity number>,
+            "match_found": true/false,
+            "selected_index": <1-based index of best match among that entity's candidates, or null>,
+            "confidence": <0.0 to 1.0>,
+            "reasoning": "<brief explanation>"
+        }}
+    ]
+}}
+
+{_AI_MATCHING_GUIDANCE}"""
+        
+        selections: Dict[int, Optional[Tuple[str, float, str]]] = {}
+        try:
+            response = await self.openai_client.chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are a charity data matching expert."},
+                    {"role": "user", "content": prompt},
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+            )
+            bulk = _AIBulkResponse.model_validate_json(response.choices[0].message.content)
+            for result in bulk.results:
+                if 1 <= result.entity_index <= len(items) and result.entity_index not in selections:
+                    selections[result.entity_index] = self._ai_selection(result, items[result.entity_index - 1][1])
+        except Exception as e:
+            logger.error("AI bulk resolution error", error=str(e), entities=len(items))
+        
+        # Anything the bulk answer missed is asked about on its own (one at a
+        # time, so callers' concurrency limits still hold)
+        for i in range(1, len(items) + 1):
+            if i not in selections:
+                selections[i] = await self.ai_resolve_entity(*items[i - 1])
+        
+        return [selections[i] for i in range(1, len(items) + 1)]
+    
+    @staticmethod
+    def _ai_context(
+        entity_name: str,
+        candidates: List[Dict[str, Any]],
+        original_data: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Describe an entity and its candidates for an AI matching prompt."""
+        context = f"Original entity name: {entity_name}\n"
+        if original_data:
+            context += f"Additional context: {original_data}\n"
+        
+        context += "\nCandidate matches:\n"
+        for i, candidate in enumerate(candidates, 1):
+            context += f"{i}. {candidate['name']} (Charity #{candidate['charity_number']}, "
+            context += f"Status: {candidate.get('status', 'Unknown')}, "
+            context += f"Similarity: {candidate['similarity_score']:.2%})\n"
+        return context
+    
+    @staticmethod
+    def _ai_selection(
+        result: _AIMatchResult,
+        candidates: List[Dict[str, Any]],
+    ) -> Optional[Tuple[str, float, str]]:
+        """Turn a validated AI answer into (charity_number, confidence, reasoning), if it picked a candidate."""
+        if result.match_found and result.selected_index:
+            idx = result.selected_index - 1
+            if 0 <= idx < len(candidates):
+                return (
+                    candidates[idx]["charity_number"],
+                    result.confidence,
+                    result.reasoning,
+                )
+        return None
+    
     async def resolve_entity(
         self,
         entity: Entity,
@@ -289,6 +548,43 @@ Be conservative - only match if confident it's the same organization."""
         Returns:
             Updated entity
         """
+        candidates = await self._resolve_without_ai(entity, use_ai=bool(use_ai and self.openai_client))
+        if candidates is None:
+            await self.db.flush()
+            return entity
+        
+        ai_result = None
+        if use_ai and self.openai_client:
+            debug_log("Attempting AI matching (OpenAI configured)",
+                     batch_id=str(entity.batch_id or ""), entity_name=entity.original_name)
+            ai_result = await self.ai_resolve_entity(
+                entity.original_name,
+                candidates,
+                entity.original_data,
+            )
+        elif use_ai:
+            debug_log("AI matching requested but OpenAI not configured (no API key)",
+                     batch_id=str(entity.batch_id or ""), entity_name=entity.original_name)
+        
+        await self._finish_resolution(entity, candidates, ai_result, ai_attempted=bool(use_ai and self.openai_client))
+        await self.db.flush()
+        return entity
+    
+    async def _resolve_without_ai(
+        self,
+        entity: Entity,
+        use_ai: bool = False,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run every resolution step that doesn't need the LLM.
+        
+        Tries direct lookup, charity number extraction and fuzzy search
+        (saving the candidates). Returns None if the entity was settled
+        here (matched or no match), otherwise the candidates still to
+        be decided by AI or manual review. use_ai says whether the AI
+        will be asked next; only then is a clear fuzzy winner accepted
+        in its place, otherwise it is left for manual review.
+        """
         entity_name = entity.original_name
         batch_id = str(entity.batch_id) if entity.batch_id else ""
         
@@ -303,7 +599,7 @@ Be conservative - only match if confident it's the same organization."""
                 debug_log(f"Direct lookup SUCCESS", batch_id=batch_id, entity_name=entity_name)
                 parsed = CharityCommissionService.parse_charity_data(charity_data)
                 await self._update_entity_from_charity(entity, parsed, "direct_lookup", 1.0)
-                return entity
+                return None
             else:
                 debug_log(f"Direct lookup returned no data", batch_id=batch_id, entity_name=entity_name)
         
@@ -327,10 +623,25 @@ Be conservative - only match if confident it's the same organization."""
                 debug_log(f"Number extraction lookup SUCCESS", batch_id=batch_id, entity_name=entity_name)
                 parsed = CharityCommissionService.parse_charity_data(charity_data)
                 await self._update_entity_from_charity(entity, parsed, "number_extraction", 0.95)
-                return entity
+                return None
             else:
                 debug_log(f"Number extraction lookup returned no data", batch_id=batch_id, entity_name=entity_name)
         
+        # Reuse a charity already matched to (nearly) the same name
+        known = self.match_known_name(entity.original_name)
+        if known:
+            known_number, known_confidence = known
+            debug_log(f"Known name hit: #{known_number} (confidence={known_confidence:.2f}), fetching details", 
+                     batch_id=batch_id, entity_name=entity_name)
+            charity_data = await self.charity_service.get_full_charity_details(known_number)
+            if charity_data:
+                debug_log(f"Known name lookup SUCCESS", batch_id=batch_id, entity_name=entity_name)
+                parsed = CharityCommissionService.parse_charity_data(charity_data)
+                await self._update_entity_from_charity(entity, parsed, "known_match", known_confidence)
+                return None
+            else:
+                debug_log(f"Known name lookup returned no data", batch_id=batch_id, entity_name=entity_name)
+        
         # Search for candidates by name
         debug_log("Searching for candidates by name", batch_id=batch_id, entity_name=entity_name)
         candidates = await self.search_candidates(entity.original_name)
@@ -339,95 +650,128 @@ Be conservative - only match if confident it's the same organization."""
             debug_log("No candidates found - marking as NO_MATCH", batch_id=batch_id, entity_name=entity_name)
             entity.resolution_status = ResolutionStatus.NO_MATCH
             entity.resolved_at = datetime.utcnow()
-            await self.db.flush()
-            return entity
+            return None
         
         debug_log(f"Found {len(candidates)} candidates", batch_id=batch_id, entity_name=entity_name)
         for i, c in enumerate(candidates[:3]):  # Log top 3
             debug_log(f"  Candidate {i+1}: '{c['name']}' (#{c['charity_number']}) - similarity={c['similarity_score']:.3f}", 
                      batch_id=batch_id, entity_name=entity_name)
         
-        # Clear any existing resolutions for this entity (in case of re-processing)
-        await self.db.execute(
-            delete(EntityResolution).where(EntityResolution.entity_id == entity.id)
-        )
+        # Check for exact match (high similarity), or a clear winner well ahead of the rest
+        best_match = candidates[0]
+        best_score = best_match["similarity_score"]
+        runner_up_score = candidates[1]["similarity_score"] if len(candidates) > 1 else None
+        decision_reason = None
+        if best_score >= 0.95:
+            method = "exact_match"
+            debug_log(f"High confidence match (score={best_score:.3f} >= 0.95), fetching details", 
+                     batch_id=batch_id, entity_name=entity_name)
+        elif (
+            use_ai
+            and runner_up_score is not None
+            and best_score >= _CLEAR_WINNER_MIN_SCORE
+            and best_score - runner_up_score >= _CLEAR_WINNER_GAP
+        ):
+            method = "fuzzy_gap"
+            decision_reason = (
+                f"Best candidate score {best_score:.3f} leads the runner-up ({runner_up_score:.3f}) "
+                f"by at least {_CLEAR_WINNER_GAP}"
+            )
+            debug_log(f"Clear winner (score={best_score:.3f}, runner-up={runner_up_score:.3f}), fetching details", 
+                     batch_id=batch_id, entity_name=entity_name)
+        else:
+            method = None
+        
+        if method:
+            try:
+                charity_data = await self.charity_service.get_full_charity_details(best_match["charity_number"])
+            except Exception:
+                # Keep the candidates for review even though the lookup failed
+                await self._save_candidates(entity, candidates)
+                raise
+            if charity_data:
+                debug_log(f"{method} SUCCESS: '{best_match['name']}'", batch_id=batch_id, entity_name=entity_name)
+                parsed = CharityCommissionService.parse_charity_data(charity_data)
+                await self._update_entity_from_charity(entity, parsed, method, best_score)
+                if decision_reason:
+                    entity.enriched_data["decision_reason"] = decision_reason
+                await self._save_candidates(entity, candidates, selected=best_match["charity_number"])
+                return None
+            else:
+                debug_log(f"{method} lookup returned no data", batch_id=batch_id, entity_name=entity_name)
+        
+        # Candidates are saved once the outcome is known, so the selected
+        # one can be flagged in the same insert
+        return candidates
+    
+    async def _save_candidates(
+        self,
+        entity: Entity,
+        candidates: List[Dict[str, Any]],
+        selected: Optional[str] = None,
+    ):
+        """Replace an entity's stored candidates with one bulk insert."""
         
         # Save all candidates as resolutions (deduplicated)
         seen_charity_numbers = set()
+        rows = []
         for candidate in candidates:
             charity_num = candidate["charity_number"]
             if charity_num in seen_charity_numbers:
                 continue
             seen_charity_numbers.add(charity_num)
-            
-            resolution = EntityResolution(
-                entity_id=entity.id,
-                charity_number=charity_num,
-                candidate_name=candidate["name"],
-                candidate_data=candidate.get("raw_data"),
-                confidence_score=candidate["similarity_score"],
-                match_method="fuzzy_search",
-            )
-            self.db.add(resolution)
+            rows.append({
+                "entity_id": entity.id,
+                "charity_number": charity_num,
+                "candidate_name": candidate["name"],
+                "candidate_data": candidate.get("raw_data"),
+                "confidence_score": candidate["similarity_score"],
+                "match_method": "fuzzy_search",
+                "is_selected": charity_num == selected,
+            })
         
-        # Check for exact match (high similarity)
-        best_match = candidates[0]
-        if best_match["similarity_score"] >= 0.95:
-            debug_log(f"High confidence match (score={best_match['similarity_score']:.3f} >= 0.95), fetching details", 
-                     batch_id=batch_id, entity_name=entity_name)
-            charity_data = await self.charity_service.get_full_charity_details(best_match["charity_number"])
-            if charity_data:
-                debug_log(f"Exact match SUCCESS: '{best_match['name']}'", batch_id=batch_id, entity_name=entity_name)
-                parsed = CharityCommissionService.parse_charity_data(charity_data)
-                await self._update_entity_from_charity(
-                    entity, parsed, "exact_match", best_match["similarity_score"]
-                )
-                # Mark the resolution as selected
-                await self.db.flush()
-                await self.db.execute(
-                    update(EntityResolution)
-                    .where(EntityResolution.entity_id == entity.id)
-                    .where(EntityResolution.charity_number == best_match["charity_number"])
-                    .values(is_selected=True)
-                )
-                return entity
-            else:
-                debug_log(f"Exact match lookup returned no data", batch_id=batch_id, entity_name=entity_name)
-        
-        # Try AI matching if enabled and we have multiple candidates
-        if use_ai and self.openai_client:
-            debug_log("Attempting AI matching (OpenAI configured)", batch_id=batch_id, entity_name=entity_name)
-            ai_result = await self.ai_resolve_entity(
-                entity.original_name,
-                candidates,
-                entity.original_data,
+        async with self._db_lock:
+            # Clear any existing resolutions for this entity (in case of re-processing)
+            await self.db.execute(
+                delete(EntityResolution).where(EntityResolution.entity_id == entity.id)
             )
-            
+            if rows:
+                await self.db.execute(insert(EntityResolution), rows)
+    
+    async def _finish_resolution(
+        self,
+        entity: Entity,
+        candidates: List[Dict[str, Any]],
+        ai_result: Optional[Tuple[str, float, str]],
+        ai_attempted: bool = True,
+    ):
+        """Apply an AI match (if any) to an entity, otherwise flag it for review."""
+        batch_id = str(entity.batch_id) if entity.batch_id else ""
+        entity_name = entity.original_name
+        
+        if ai_attempted:
             if ai_result:
                 charity_number, confidence, reasoning = ai_result
                 debug_log(f"AI matched to #{charity_number} with confidence={confidence:.2f}: {reasoning[:50]}...", 
                          batch_id=batch_id, entity_name=entity_name)
-                charity_data = await self.charity_service.get_full_charity_details(charity_number)
+                try:
+                    charity_data = await self.charity_service.get_full_charity_details(charity_number)
+                except Exception:
+                    # Keep the candidates for review even though the lookup failed
+                    await self._save_candidates(entity, candidates)
+                    raise
                 if charity_data:
                     debug_log(f"AI match lookup SUCCESS", batch_id=batch_id, entity_name=entity_name)
                     parsed = CharityCommissionService.parse_charity_data(charity_data)
                     await self._update_entity_from_charity(entity, parsed, "ai_match", confidence)
                     entity.enriched_data = entity.enriched_data or {}
                     entity.enriched_data["ai_reasoning"] = reasoning
-                    
-                    # Mark the resolution as selected
-                    await self.db.flush()
-                    await self.db.execute(
-                        update(EntityResolution)
-                        .where(EntityResolution.entity_id == entity.id)
-                        .where(EntityResolution.charity_number == charity_number)
-                        .values(is_selected=True)
-                    )
-                    return entity
+                    await self._save_candidates(entity, candidates, selected=charity_number)
+                    return
             else:
                 debug_log("AI matching did not produce a result", batch_id=batch_id, entity_name=entity_name)
-        elif use_ai:
-            debug_log("AI matching requested but OpenAI not configured (no API key)", batch_id=batch_id, entity_name=entity_name)
+        
+        await self._save_candidates(entity, candidates)
         
         # Multiple candidates, needs manual review
         # Store the best match's confidence so user knows how close we got
@@ -446,9 +790,7 @@ Be conservative - only match if confident it's the same organization."""
         entity.resolution_confidence = best_candidate_score
         entity.resolution_method = "needs_review"
         entity.resolved_at = datetime.utcnow()
-        await self.db.flush()
         debug_log(f"Resolution complete: status={entity.resolution_status}", batch_id=batch_id, entity_name=entity_name)
-        return entity
     
     async def _update_entity_from_charity(
         self,
@@ -482,7 +824,9 @@ Be conservative - only match if confident it's the same organization."""
         entity.enriched_data["trustees"] = charity_data.get("trustees", [])
         entity.enriched_data["subsidiaries"] = charity_data.get("subsidiaries", [])
         
-        await self.db.flush()
+        if method in _KNOWN_NAME_METHODS:
+            self._remember_name(entity.original_name, entity.charity_number, confidence)
+            self._remember_name(entity.resolved_name, entity.charity_number, confidence)
     
     async def process_batch(
         self,
@@ -502,7 +846,7 @@ Be conservative - only match if confident it's the same organization."""
             Updated batch
         """
         batch_id_str = str(batch_id)
-        start_time = datetime.utcnow()
+        start_time = time.perf_counter()
         
         debug_log("=== EntityResolver.process_batch STARTED ===", batch_id=batch_id_str)
         debug_log(f"Parameters: use_ai={use_ai}, max_concurrent={max_concurrent}", batch_id=batch_id_str)
@@ -526,9 +870,10 @@ Be conservative - only match if confident it's the same organization."""
         debug_log("Updated batch status to PROCESSING", batch_id=batch_id_str)
         
         try:
-            # Get all entities in batch (both pending and those needing review)
+            # Get IDs of the entities to process (both pending and those needing review);
+            # the rows themselves are loaded a chunk at a time below
             result = await self.db.execute(
-                select(Entity)
+                select(Entity.id)
                 .where(Entity.batch_id == batch_id)
                 .where(Entity.resolution_status.in_([
                     ResolutionStatus.PENDING,
@@ -536,69 +881,42 @@ Be conservative - only match if confident it's the same organization."""
                     ResolutionStatus.MULTIPLE_MATCHES,
                 ]))
             )
-            entities = result.scalars().all()
+            entity_ids = result.scalars().all()
             
-            debug_log(f"Found {len(entities)} entities to process (PENDING/MANUAL_REVIEW/MULTIPLE_MATCHES)", batch_id=batch_id_str)
+            debug_log(f"Found {len(entity_ids)} entities to process (PENDING/MANUAL_REVIEW/MULTIPLE_MATCHES)", batch_id=batch_id_str)
             
-            if len(entities) == 0:
+            if len(entity_ids) == 0:
                 debug_log("No entities to process, marking batch as completed", batch_id=batch_id_str, level="INFO")
                 batch.status = BatchStatus.COMPLETED
                 batch.processing_completed_at = datetime.utcnow()
                 await self.db.flush()
                 return batch
             
-            # Log entity names for debugging
-            entity_names = [e.original_name for e in entities[:10]]  # First 10
-            debug_log(f"First entities to process: {entity_names}", batch_id=batch_id_str)
-            
-            # Get total count of all entities (not just pending)
-            total_result = await self.db.execute(
-                select(Entity).where(Entity.batch_id == batch_id)
+            # Get total count of all entities (not just pending) and of those already matched
+            count_result = await self.db.execute(
+                select(
+                    func.count(),
+                    func.count().filter(Entity.resolution_status == ResolutionStatus.MATCHED),
+                ).where(Entity.batch_id == batch_id)
             )
-            all_entities = total_result.scalars().all()
-            batch.total_records = len(all_entities)
+            total_records, already_matched = count_result.one()
+            batch.total_records = total_records
+            debug_log(f"Total entities in batch: {total_records}, already matched: {already_matched}", batch_id=batch_id_str)
             
-            # Count already matched entities
-            already_matched = sum(1 for e in all_entities if e.resolution_status == ResolutionStatus.MATCHED)
-            debug_log(f"Total entities in batch: {len(all_entities)}, already matched: {already_matched}", batch_id=batch_id_str)
+            await self.load_known_names(batch.user_id)
+            debug_log(f"Loaded {len(self._known_names)} known names", batch_id=batch_id_str)
             
             processed = 0
             matched = already_matched
             failed = 0
             
-            debug_log("Starting SEQUENTIAL processing (one entity at a time)", batch_id=batch_id_str)
-            
-            for entity in entities:
-                entity_start = datetime.utcnow()
+            async def settle(entity: Entity, entity_start: float, step):
+                """Run a resolution step, record the outcome unless candidates are still undecided."""
+                nonlocal processed, matched, failed
                 try:
-                    debug_log(f"Processing entity {processed + 1}/{len(entities)}", 
-                             batch_id=batch_id_str, entity_name=entity.original_name)
-                    
-                    # Log original data for debugging
-                    if entity.original_data:
-                        debug_log(f"Original data keys: {list(entity.original_data.keys())}", 
-                                 batch_id=batch_id_str, entity_name=entity.original_name)
-                    
-                    await self.resolve_entity(entity, use_ai=use_ai)
-                    
-                    entity_duration = (datetime.utcnow() - entity_start).total_seconds()
-                    
-                    if entity.resolution_status == ResolutionStatus.MATCHED:
-                        matched += 1
-                        debug_log(f"✓ MATCHED in {entity_duration:.2f}s: resolved_name='{entity.resolved_name}', charity_number={entity.charity_number}, method={entity.resolution_method}, confidence={entity.resolution_confidence}", 
-                                 batch_id=batch_id_str, entity_name=entity.original_name, level="INFO")
-                    elif entity.resolution_status == ResolutionStatus.NO_MATCH:
-                        debug_log(f"✗ NO_MATCH in {entity_duration:.2f}s: No matching charity found", 
-                                 batch_id=batch_id_str, entity_name=entity.original_name)
-                    elif entity.resolution_status == ResolutionStatus.MULTIPLE_MATCHES:
-                        debug_log(f"? MULTIPLE_MATCHES in {entity_duration:.2f}s: Multiple candidates found, needs review", 
-                                 batch_id=batch_id_str, entity_name=entity.original_name)
-                    else:
-                        debug_log(f"- Status={entity.resolution_status} in {entity_duration:.2f}s", 
-                                 batch_id=batch_id_str, entity_name=entity.original_name)
-                                 
+                    pending = await step
                 except Exception as e:
-                    entity_duration = (datetime.utcnow() - entity_start).total_seconds()
+                    entity_duration = time.perf_counter() - entity_start
                     error_tb = traceback.format_exc()
                     debug_log(f"✗ ERROR in {entity_duration:.2f}s: {type(e).__name__}: {str(e)}", 
                              batch_id=batch_id_str, entity_name=entity.original_name, level="ERROR")
@@ -612,24 +930,147 @@ Be conservative - only match if confident it's the same organization."""
                     entity.resolution_status = ResolutionStatus.MANUAL_REVIEW
                     entity.resolved_at = datetime.utcnow()
                     failed += 1
+                else:
+                    if pending is not None:
+                        return pending
                     
-                finally:
-                    processed += 1
-                    batch.processed_records = already_matched + processed
-                    batch.matched_records = matched
-                    batch.failed_records = failed
+                    entity_duration = time.perf_counter() - entity_start
                     
-                    # Flush after each entity to save progress
-                    await self.db.flush()
+                    if entity.resolution_status == ResolutionStatus.MATCHED:
+                        matched += 1
+                        debug_log(f"✓ MATCHED in {entity_duration:.2f}s: resolved_name='{entity.resolved_name}', charity_number={entity.charity_number}, method={entity.resolution_method}, confidence={entity.resolution_confidence}", 
+                                 batch_id=batch_id_str, entity_name=entity.original_name, level="INFO")
+                    elif entity.resolution_status == ResolutionStatus.NO_MATCH:
+                        debug_log(f"✗ NO_MATCH in {entity_duration:.2f}s: No matching charity found", 
+                                 batch_id=batch_id_str, entity_name=entity.original_name)
+                    elif entity.resolution_status == ResolutionStatus.MULTIPLE_MATCHES:
+                        debug_log(f"? MULTIPLE_MATCHES in {entity_duration:.2f}s: Multiple candidates found, needs review", 
+                                 batch_id=batch_id_str, entity_name=entity.original_name)
+                    else:
+                        debug_log(f"- Status={entity.resolution_status} in {entity_duration:.2f}s", 
+                                 batch_id=batch_id_str, entity_name=entity.original_name)
+                
+                processed += 1
+                batch.processed_records = already_matched + processed
+                batch.matched_records = matched
+                batch.failed_records = failed
+                
+                # Log progress every 10 entities or on each entity in small batches
+                if processed % 10 == 0 or len(entity_ids) <= 20:
+                    elapsed = time.perf_counter() - start_time
+                    rate = processed / elapsed if elapsed > 0 else 0
+                    debug_log(f"=== PROGRESS: {processed}/{len(entity_ids)} ({(processed/len(entity_ids)*100):.1f}%) | matched={matched} | failed={failed} | rate={rate:.2f}/sec ===", 
+                             batch_id=batch_id_str, level="INFO")
+                return None
+            
+            run_ai = use_ai and self.openai_client is not None
+            if use_ai and not run_ai:
+                debug_log("AI matching requested but OpenAI not configured (no API key)", batch_id=batch_id_str)
+            
+            semaphore = asyncio.Semaphore(max_concurrent)
+            
+            async def prefetch_details(charity_number: str):
+                # Warm the service's details cache while the AI calls are in flight,
+                # so stage 3 doesn't fetch the pick itself; a failure here resurfaces
+                # (and is handled per entity) when stage 3 fetches. Without the cache
+                # the result would be thrown away and fetched again.
+                if not self.charity_service.cache_enabled:
+                    return
+                try:
+                    await self.charity_service.get_full_charity_details(charity_number)
+                except Exception:
+                    pass
+            
+            async def ask_ai(group: List[Tuple[Entity, List[Dict[str, Any]], datetime]]):
+                async with semaphore:
+                    ai_results = await self.ai_resolve_entities_bulk([
+                        (entity.original_name, candidates, entity.original_data)
+                        for entity, candidates, _ in group
+                    ])
+                # Warm the details cache for the group's winners in one call (repeats are
+                # fetched once); failures resurface per entity when stage 3 fetches
+                winners = [ai_result[0] for ai_result in ai_results if ai_result]
+                if winners and self.charity_service.cache_enabled:
+                    await self.charity_service.get_full_charity_details_batch(winners)
+                return ai_results
+            
+            # Entities go through in chunks so that AI results, pending
+            # changes and the identity map stay bounded by the chunk size,
+            # and progress is committed (visible to pollers) as we go.
+            debug_log(f"Starting processing in chunks of {_CHUNK_SIZE}", batch_id=batch_id_str)
+            for chunk_start in range(0, len(entity_ids), _CHUNK_SIZE):
+                chunk_result = await self.db.execute(
+                    select(Entity).where(Entity.id.in_(entity_ids[chunk_start:chunk_start + _CHUNK_SIZE]))
+                )
+                chunk = chunk_result.scalars().all()
+                
+                if chunk_start == 0:
+                    # Log entity names for debugging
+                    entity_names = [e.original_name for e in chunk[:10]]  # First 10
+                    debug_log(f"First entities to process: {entity_names}", batch_id=batch_id_str)
+                
+                # Stage 1: lookups and fuzzy search for the whole chunk, up to max_concurrent
+                # entities at a time (session writes are serialized by _db_lock).
+                # Entities the search can't settle are held back for a single AI pass.
+                speculative: List[asyncio.Task] = []
+                
+                async def first_pass(position: int, entity: Entity):
+                    async with semaphore:
+                        entity_start = time.perf_counter()
+                        debug_log(f"Processing entity {position}/{len(entity_ids)}", 
+                                 batch_id=batch_id_str, entity_name=entity.original_name)
+                        
+                        # Log original data for debugging
+                        if entity.original_data:
+                            debug_log(f"Original data keys: {list(entity.original_data.keys())}", 
+                                     batch_id=batch_id_str, entity_name=entity.original_name)
+                        
+                        candidates = await settle(entity, entity_start, self._resolve_without_ai(entity, use_ai=run_ai))
+                        if candidates is None:
+                            return None
+                        if run_ai:
+                            # Fetch a likely top candidate's details while the AI pass runs,
+                            # so an AI pick of it is served from cache
+                            if candidates[0]["similarity_score"] >= _SPECULATIVE_MIN_SCORE:
+                                speculative.append(asyncio.create_task(
+                                    prefetch_details(candidates[0]["charity_number"])
+                                ))
+                            return entity, candidates, entity_start
+                        await settle(entity, entity_start, self._finish_resolution(entity, candidates, None, ai_attempted=False))
+                        return None
+                
+                first_results = await asyncio.gather(
+                    *(first_pass(chunk_start + i + 1, entity) for i, entity in enumerate(chunk))
+                )
+                awaiting_ai = [pending for pending in first_results if pending is not None]
+                
+                # Stage 2: ask the model about the chunk's unresolved entities together,
+                # bounded by max_concurrent, instead of one request per loop turn.
+                if awaiting_ai:
+                    debug_log(f"Running AI matching for {len(awaiting_ai)} entities (max_concurrent={max_concurrent})", 
+                             batch_id=batch_id_str, level="INFO")
+                    # Several entities share each prompt, cutting the number of model round trips
+                    group_results = await asyncio.gather(*(
+                        ask_ai(awaiting_ai[i:i + _AI_ENTITIES_PER_PROMPT])
+                        for i in range(0, len(awaiting_ai), _AI_ENTITIES_PER_PROMPT)
+                    ))
+                    ai_results = [ai_result for group in group_results for ai_result in group]
                     
-                    # Log progress every 10 entities or on each entity in small batches
-                    if processed % 10 == 0 or len(entities) <= 20:
-                        elapsed = (datetime.utcnow() - start_time).total_seconds()
-                        rate = processed / elapsed if elapsed > 0 else 0
-                        debug_log(f"=== PROGRESS: {processed}/{len(entities)} ({(processed/len(entities)*100):.1f}%) | matched={matched} | failed={failed} | rate={rate:.2f}/sec ===", 
-                                 batch_id=batch_id_str, level="INFO")
+                    # Stage 3: apply the answers back on the shared session
+                    for (entity, candidates, entity_start), ai_result in zip(awaiting_ai, ai_results):
+                        await settle(entity, entity_start, self._finish_resolution(entity, candidates, ai_result))
+                
+                # Stop waiting on leftover prefetches; a request already sent still
+                # completes (the service shields shared lookups) and fills the cache
+                for task in speculative:
+                    task.cancel()
+                
+                # Persist the chunk and drop its entities from the session
+                await self.db.commit()
+                for entity in chunk:
+                    self.db.expunge(entity)
             
-            total_duration = (datetime.utcnow() - start_time).total_seconds()
+            total_duration = time.perf_counter() - start_time
             debug_log(f"=== ALL ENTITIES PROCESSED in {total_duration:.2f}s ===", batch_id=batch_id_str, level="INFO")
             debug_log(f"Final counts: total={processed}, matched={matched}, failed={failed}", batch_id=batch_id_str, level="INFO")
             
@@ -652,7 +1093,7 @@ Be conservative - only match if confident it's the same organization."""
                      batch_id=batch_id_str, level="INFO")
             
         except Exception as e:
-            total_duration = (datetime.utcnow() - start_time).total_seconds()
+            total_duration = time.perf_counter() - start_time
             error_tb = traceback.format_exc()
             debug_log(f"=== EXCEPTION in process_batch after {total_duration:.2f}s ===", batch_id=batch_id_str, level="ERROR")
             debug_log(f"Exception: {type(e).__name__}: {str(e)}", batch_id=batch_id_str, level="ERROR")
@@ -663,10 +1104,6 @@ Be conservative - only match if confident it's the same organization."""
             await self.db.flush()
             raise
         
-        finally:
-            debug_log("Closing charity service connection", batch_id=batch_id_str)
-            await self.close()
-        
         return batch
     
     async def confirm_resolution(
@@ -1,13 +1,15 @@
 """Excel export service with multi-tab support."""
 import io
+from collections import Counter
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
+import xlsxwriter
+from xlsxwriter.format import Format
+from xlsxwriter.workbook import Workbook
+from xlsxwriter.worksheet import Worksheet
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 # selectinload removed - using separate query for entities (dynamic relationship)
@@ -45,20 +47,26 @@ def sanitize_cell_value(value) -> str:
 class ExportService:
     """Service for exporting data to Excel with multiple tabs."""
     
-    # Styling constants
-    HEADER_FILL = PatternFill(start_color="1F4E79", end_color="1F4E79", fill_type="solid")
-    HEADER_FONT = Font(color="FFFFFF", bold=True, size=11)
-    SUBHEADER_FILL = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    ALT_ROW_FILL = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-    THIN_BORDER = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    # Styling constants (xlsxwriter format properties)
+    HEADER_FORMAT = {"bg_color": "#1F4E79", "font_color": "#FFFFFF", "bold": True, "font_size": 11, "border": 1}
+    SUBHEADER_FORMAT = {**HEADER_FORMAT, "bg_color": "#4472C4"}
+    CELL_FORMAT = {"border": 1}
+    ALT_ROW_FORMAT = {"border": 1, "bg_color": "#D9E2F3"}
+    CURRENCY_FORMAT = '£#,##0.00'
+    
+    # constant_memory flushes each row to a temp file once the next row starts.
+    # Values are sanitised for formula injection, so never turn strings into
+    # formulas or hyperlinks.
+    WORKBOOK_OPTIONS = {
+        "constant_memory": True,
+        "strings_to_numbers": False,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    }
     
     def __init__(self, db: AsyncSession):
         self.db = db
+        self._formats: Dict[tuple, Format] = {}
     
     async def export_batch_to_excel(
         self,
@@ -99,12 +107,10 @@ class ExportService:
         )
         entities = entities_result.scalars().all()
         
-        # Create workbook
-        wb = Workbook()
-        
-        # Remove default sheet
-        if "Sheet" in wb.sheetnames:
-            del wb["Sheet"]
+        # Create workbook; formats belong to a single workbook
+        output = io.BytesIO()
+        wb = xlsxwriter.Workbook(output, self.WORKBOOK_OPTIONS)
+        self._formats = {}
         
         # Tab 1: Summary
         await self._create_summary_sheet(wb, batch, entities)
@@ -114,11 +120,11 @@ class ExportService:
         
         # Tab 3: Resolution Candidates
         if include_resolutions:
-            await self._create_resolutions_sheet(wb, entities)
+            await self._create_resolutions_sheet(wb, batch_id)
         
         # Tab 4: Ownership Tree
         if include_ownership:
-            await self._create_ownership_sheet(wb, entities)
+            await self._create_ownership_sheet(wb, batch_id, entities)
         
         # Tab 5: Financial Data
         if include_financial:
@@ -129,11 +135,80 @@ class ExportService:
             await self._create_enriched_sheet(wb, entities)
         
         # Save to bytes
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        wb.close()
         return output.getvalue()
     
+    def _format(self, wb: Workbook, **properties) -> Format:
+        """Return the workbook format for these properties, creating it once."""
+        key = tuple(sorted(properties.items()))
+        fmt = self._formats.get(key)
+        if fmt is None:
+            fmt = self._formats[key] = wb.add_format(properties)
+        return fmt
+    
+    @staticmethod
+    def _set_column_widths(ws: Worksheet, widths: List[int]):
+        """Size columns to their longest value, capped at 50 characters."""
+        for col_idx, width in enumerate(widths):
+            ws.set_column(col_idx, col_idx, min(width + 2, 50))
+    
+    def _write_table(
+        self,
+        wb: Workbook,
+        ws: Worksheet,
+        headers: List[str],
+        rows: List[List[Any]],
+        first_row: int = 0,
+        header_format: Optional[Dict[str, Any]] = None,
+        number_formats: Optional[Dict[str, str]] = None,
+        widths: Optional[List[int]] = None,
+    ) -> int:
+        """
+        Write a styled header row followed by bordered, banded data rows.
+        
+        Args:
+            wb: Workbook owning the formats
+            ws: Worksheet to write to
+            headers: Column headers
+            rows: Row values, in header order
+            first_row: Zero-based row for the header
+            header_format: Header format properties, defaults to HEADER_FORMAT
+            number_formats: Number format per header name
+            widths: Running column widths, shared by tables on the same sheet
+        
+        Returns:
+            Zero-based index of the first row after the table
+        """
+        ws.write_row(first_row, 0, headers, self._format(wb, **(header_format or self.HEADER_FORMAT)))
+        
+        if widths is None:
+            widths = [0] * len(headers)
+        for col_idx, header in enumerate(headers):
+            widths[col_idx] = max(widths[col_idx], len(header))
+        
+        number_formats = number_formats or {}
+        plain_formats = []
+        banded_formats = []
+        for header in headers:
+            extra = {"num_format": number_formats[header]} if header in number_formats else {}
+            plain_formats.append(self._format(wb, **self.CELL_FORMAT, **extra))
+            banded_formats.append(self._format(wb, **self.ALT_ROW_FORMAT, **extra))
+        
+        # Band even sheet rows, i.e. odd zero-based indices. Column widths are
+        # measured in the same pass; xlsxwriter only emits them on close.
+        write = ws.write
+        for row_idx, row in enumerate(rows, start=first_row + 1):
+            formats = banded_formats if row_idx % 2 else plain_formats
+            for col_idx, value in enumerate(row):
+                write(row_idx, col_idx, value, formats[col_idx])
+                if value is not None:
+                    length = len(str(value))
+                    if length > widths[col_idx]:
+                        widths[col_idx] = length
+        
+        self._set_column_widths(ws, widths)
+        return first_row + 1 + len(rows)
+    
     async def _create_summary_sheet(
         self,
         wb: Workbook,
@@ -141,17 +216,19 @@ class ExportService:
         entities: List[Entity],
     ):
         """Create summary overview sheet."""
-        ws = wb.create_sheet("Summary")
+        ws = wb.add_worksheet("Summary")
+        ws.set_column(0, 0, 20)
+        ws.set_column(1, 1, 50)
         
         # Title
-        ws.merge_cells('A1:D1')
-        ws['A1'] = f"Charity Data Enrichment Report: {sanitize_cell_value(batch.name)}"
-        ws['A1'].font = Font(size=16, bold=True)
-        ws['A1'].alignment = Alignment(horizontal='center')
+        ws.merge_range(
+            0, 0, 0, 3,
+            f"Charity Data Enrichment Report: {sanitize_cell_value(batch.name)}",
+            self._format(wb, bold=True, font_size=16, align="center"),
+        )
         
         # Batch info
-        ws['A3'] = "Batch Information"
-        ws['A3'].font = Font(bold=True, size=12)
+        ws.write(2, 0, "Batch Information", self._format(wb, bold=True, font_size=12))
         
         info = [
             ("Batch ID:", str(batch.id)),
@@ -162,20 +239,20 @@ class ExportService:
             ("Status:", batch.status.value if batch.status else "Unknown"),
         ]
         
-        for i, (label, value) in enumerate(info, start=4):
-            ws[f'A{i}'] = label
-            ws[f'A{i}'].font = Font(bold=True)
-            ws[f'B{i}'] = value
+        label_format = self._format(wb, bold=True)
+        for i, (label, value) in enumerate(info, start=3):
+            ws.write(i, 0, label, label_format)
+            ws.write(i, 1, value)
         
         # Statistics
-        ws['A12'] = "Statistics"
-        ws['A12'].font = Font(bold=True, size=12)
+        ws.write(11, 0, "Statistics", self._format(wb, bold=True, font_size=12))
         
-        matched = sum(1 for e in entities if e.resolution_status.value == "matched")
-        confirmed = sum(1 for e in entities if e.resolution_status.value == "confirmed")
-        no_match = sum(1 for e in entities if e.resolution_status.value == "no_match")
-        pending = sum(1 for e in entities if e.resolution_status.value == "pending")
-        review = sum(1 for e in entities if e.resolution_status.value in ("multiple_matches", "manual_review"))
+        status_counts = Counter(e.resolution_status.value for e in entities)
+        matched = status_counts["matched"]
+        confirmed = status_counts["confirmed"]
+        no_match = status_counts["no_match"]
+        pending = status_counts["pending"]
+        review = status_counts["multiple_matches"] + status_counts["manual_review"]
         
         stats = [
             ("Total Records:", len(entities)),
@@ -187,142 +264,88 @@ class ExportService:
             ("Match Rate:", f"{((matched + confirmed) / len(entities) * 100):.1f}%" if entities else "0%"),
         ]
         
-        for i, (label, value) in enumerate(stats, start=13):
-            ws[f'A{i}'] = label
-            ws[f'A{i}'].font = Font(bold=True)
-            ws[f'B{i}'] = value
-        
-        # Adjust column widths
-        ws.column_dimensions['A'].width = 20
-        ws.column_dimensions['B'].width = 50
+        for i, (label, value) in enumerate(stats, start=12):
+            ws.write(i, 0, label, label_format)
+            ws.write(i, 1, value)
     
     async def _create_entities_sheet(self, wb: Workbook, entities: List[Entity]):
         """Create main entities data sheet."""
-        ws = wb.create_sheet("Entities")
-
-        # Prepare data (sanitise all string values to prevent formula injection)
-        data = []
-        for entity in entities:
-            data.append({
-                "Row #": entity.row_number,
-                "Original Name": sanitize_cell_value(entity.original_name),
-                "Resolved Name": sanitize_cell_value(entity.resolved_name),
-                "Entity Type": entity.entity_type.value if entity.entity_type else "",
-                "Charity Number": sanitize_cell_value(entity.charity_number),
-                "Company Number": sanitize_cell_value(entity.company_number),
-                "Status": sanitize_cell_value(entity.charity_status),
-                "Resolution Status": entity.resolution_status.value if entity.resolution_status else "",
-                "Confidence": f"{entity.resolution_confidence:.1%}" if entity.resolution_confidence else "",
-                "Method": sanitize_cell_value(entity.resolution_method),
-                "Registration Date": entity.charity_registration_date.strftime("%Y-%m-%d") if entity.charity_registration_date else "",
-                "Website": sanitize_cell_value(entity.charity_website),
-                "Email": sanitize_cell_value(entity.charity_contact_email),
-                "Address": sanitize_cell_value(entity.charity_address),
-            })
+        ws = wb.add_worksheet("Entities")
         
-        if not data:
-            ws['A1'] = "No entities found"
+        if not entities:
+            ws.write(0, 0, "No entities found")
             return
         
-        df = pd.DataFrame(data)
+        headers = [
+            "Row #", "Original Name", "Resolved Name", "Entity Type", "Charity Number",
+            "Company Number", "Status", "Resolution Status", "Confidence", "Method",
+            "Registration Date", "Website", "Email", "Address",
+        ]
         
-        # Write headers
-        for col_idx, column in enumerate(df.columns, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=column)
-            cell.fill = self.HEADER_FILL
-            cell.font = self.HEADER_FONT
-            cell.border = self.THIN_BORDER
-            cell.alignment = Alignment(horizontal='center')
-        
-        # Write data
-        for row_idx, row in enumerate(df.values, start=2):
-            for col_idx, value in enumerate(row, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = self.THIN_BORDER
-                if row_idx % 2 == 0:
-                    cell.fill = self.ALT_ROW_FILL
-        
-        # Auto-fit columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column].width = adjusted_width
+        # Prepare rows (sanitise all string values to prevent formula injection)
+        rows = []
+        for entity in entities:
+            rows.append([
+                entity.row_number,
+                sanitize_cell_value(entity.original_name),
+                sanitize_cell_value(entity.resolved_name),
+                entity.entity_type.value if entity.entity_type else "",
+                sanitize_cell_value(entity.charity_number),
+                sanitize_cell_value(entity.company_number),
+                sanitize_cell_value(entity.charity_status),
+                entity.resolution_status.value if entity.resolution_status else "",
+                f"{entity.resolution_confidence:.1%}" if entity.resolution_confidence else "",
+                sanitize_cell_value(entity.resolution_method),
+                entity.charity_registration_date.strftime("%Y-%m-%d") if entity.charity_registration_date else "",
+                sanitize_cell_value(entity.charity_website),
+                sanitize_cell_value(entity.charity_contact_email),
+                sanitize_cell_value(entity.charity_address),
+            ])
+        
+        self._write_table(wb, ws, headers, rows, header_format={**self.HEADER_FORMAT, "align": "center"})
     
-    async def _create_resolutions_sheet(self, wb: Workbook, entities: List[Entity]):
+    async def _create_resolutions_sheet(self, wb: Workbook, batch_id: UUID):
         """Create resolution candidates sheet."""
-        ws = wb.create_sheet("Resolution Candidates")
+        ws = wb.add_worksheet("Resolution Candidates")
         
-        # Get all resolutions
-        entity_ids = [e.id for e in entities]
+        # Get all resolutions with their entity's name, joined in the database
         result = await self.db.execute(
-            select(EntityResolution)
-            .where(EntityResolution.entity_id.in_(entity_ids))
+            select(EntityResolution, Entity.original_name)
+            .join(Entity, Entity.id == EntityResolution.entity_id)
+            .where(Entity.batch_id == batch_id)
             .order_by(EntityResolution.entity_id, EntityResolution.confidence_score.desc())
         )
-        resolutions = result.scalars().all()
-        
-        # Create entity lookup
-        entity_lookup = {e.id: e for e in entities}
-        
-        # Prepare data
-        data = []
-        for res in resolutions:
-            entity = entity_lookup.get(res.entity_id)
-            data.append({
-                "Original Name": sanitize_cell_value(entity.original_name) if entity else "",
-                "Candidate Name": sanitize_cell_value(res.candidate_name),
-                "Charity Number": sanitize_cell_value(res.charity_number),
-                "Confidence Score": f"{res.confidence_score:.1%}",
-                "Match Method": sanitize_cell_value(res.match_method),
-                "Selected": "Yes" if res.is_selected else "No",
-            })
+        resolutions = result.all()
         
-        if not data:
-            ws['A1'] = "No resolution candidates found"
+        if not resolutions:
+            ws.write(0, 0, "No resolution candidates found")
             return
         
-        df = pd.DataFrame(data)
+        headers = [
+            "Original Name", "Candidate Name", "Charity Number",
+            "Confidence Score", "Match Method", "Selected",
+        ]
         
-        # Write headers
-        for col_idx, column in enumerate(df.columns, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=column)
-            cell.fill = self.HEADER_FILL
-            cell.font = self.HEADER_FONT
-            cell.border = self.THIN_BORDER
-        
-        # Write data
-        for row_idx, row in enumerate(df.values, start=2):
-            for col_idx, value in enumerate(row, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = self.THIN_BORDER
-                if row_idx % 2 == 0:
-                    cell.fill = self.ALT_ROW_FILL
-        
-        # Auto-fit columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column].width = min(max_length + 2, 50)
+        # Prepare rows
+        rows = []
+        for res, original_name in resolutions:
+            rows.append([
+                sanitize_cell_value(original_name),
+                sanitize_cell_value(res.candidate_name),
+                sanitize_cell_value(res.charity_number),
+                f"{res.confidence_score:.1%}",
+                sanitize_cell_value(res.match_method),
+                "Yes" if res.is_selected else "No",
+            ])
+        
+        self._write_table(wb, ws, headers, rows)
     
-    async def _create_ownership_sheet(self, wb: Workbook, entities: List[Entity]):
+    async def _create_ownership_sheet(self, wb: Workbook, batch_id: UUID, entities: List[Entity]):
         """Create ownership tree sheet."""
-        ws = wb.create_sheet("Ownership Tree")
+        ws = wb.add_worksheet("Ownership Tree")
         
-        # Get ownership relationships
-        entity_ids = [e.id for e in entities]
+        # Get ownership relationships (subquery rather than one bind parameter per entity)
+        entity_ids = select(Entity.id).where(Entity.batch_id == batch_id)
         result = await self.db.execute(
             select(EntityOwnership)
             .where(
@@ -332,220 +355,144 @@ class ExportService:
         )
         ownerships = result.scalars().all()
         
+        if not ownerships:
+            ws.write(0, 0, "No ownership relationships found")
+            return
+        
         # Create entity lookup
         entity_lookup = {e.id: e for e in entities}
         
-        # Prepare data
-        data = []
+        headers = [
+            "Owner Name", "Owner Charity #", "Relationship", "Owned Entity", "Owned Charity #",
+            "Owned Company #", "Ownership %", "Source", "Verified",
+        ]
+        
+        # Prepare rows
+        rows = []
         for ownership in ownerships:
             owner = entity_lookup.get(ownership.owner_id)
             owned = entity_lookup.get(ownership.owned_id)
             
-            data.append({
-                "Owner Name": sanitize_cell_value(owner.resolved_name or owner.original_name) if owner else "Unknown",
-                "Owner Charity #": sanitize_cell_value(owner.charity_number) if owner else "",
-                "Relationship": sanitize_cell_value(ownership.ownership_type),
-                "Owned Entity": sanitize_cell_value(owned.resolved_name or owned.original_name) if owned else "Unknown",
-                "Owned Charity #": sanitize_cell_value(owned.charity_number) if owned else "",
-                "Owned Company #": sanitize_cell_value(owned.company_number) if owned else "",
-                "Ownership %": f"{ownership.ownership_percentage:.1f}%" if ownership.ownership_percentage else "",
-                "Source": sanitize_cell_value(ownership.source),
-                "Verified": "Yes" if ownership.verified else "No",
-            })
-        
-        if not data:
-            ws['A1'] = "No ownership relationships found"
-            return
-        
-        df = pd.DataFrame(data)
-        
-        # Write headers
-        for col_idx, column in enumerate(df.columns, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=column)
-            cell.fill = self.HEADER_FILL
-            cell.font = self.HEADER_FONT
-            cell.border = self.THIN_BORDER
-        
-        # Write data
-        for row_idx, row in enumerate(df.values, start=2):
-            for col_idx, value in enumerate(row, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = self.THIN_BORDER
-                if row_idx % 2 == 0:
-                    cell.fill = self.ALT_ROW_FILL
-        
-        # Auto-fit columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column].width = min(max_length + 2, 50)
+            rows.append([
+                sanitize_cell_value(owner.resolved_name or owner.original_name) if owner else "Unknown",
+                sanitize_cell_value(owner.charity_number) if owner else "",
+                sanitize_cell_value(ownership.ownership_type),
+                sanitize_cell_value(owned.resolved_name or owned.original_name) if owned else "Unknown",
+                sanitize_cell_value(owned.charity_number) if owned else "",
+                sanitize_cell_value(owned.company_number) if owned else "",
+                f"{ownership.ownership_percentage:.1f}%" if ownership.ownership_percentage else "",
+                sanitize_cell_value(ownership.source),
+                "Yes" if ownership.verified else "No",
+            ])
+        
+        self._write_table(wb, ws, headers, rows)
     
     async def _create_financial_sheet(self, wb: Workbook, entities: List[Entity]):
         """Create financial summary sheet."""
-        ws = wb.create_sheet("Financial Data")
+        ws = wb.add_worksheet("Financial Data")
         
-        # Prepare data
-        data = []
+        headers = [
+            "Name", "Charity Number", "Status", "Latest Income",
+            "Latest Expenditure", "Net Position", "Financial Year End",
+        ]
+        
+        # Prepare rows
+        rows = []
+        total_income = 0
+        total_expenditure = 0
         for entity in entities:
             if entity.latest_income or entity.latest_expenditure:
-                data.append({
-                    "Name": sanitize_cell_value(entity.resolved_name or entity.original_name),
-                    "Charity Number": sanitize_cell_value(entity.charity_number),
-                    "Status": sanitize_cell_value(entity.charity_status),
-                    "Latest Income": entity.latest_income,
-                    "Latest Expenditure": entity.latest_expenditure,
-                    "Net Position": (entity.latest_income or 0) - (entity.latest_expenditure or 0),
-                    "Financial Year End": entity.latest_financial_year_end.strftime("%Y-%m-%d") if entity.latest_financial_year_end else "",
-                })
-        
-        if not data:
-            ws['A1'] = "No financial data available"
+                rows.append([
+                    sanitize_cell_value(entity.resolved_name or entity.original_name),
+                    sanitize_cell_value(entity.charity_number),
+                    sanitize_cell_value(entity.charity_status),
+                    entity.latest_income,
+                    entity.latest_expenditure,
+                    (entity.latest_income or 0) - (entity.latest_expenditure or 0),
+                    entity.latest_financial_year_end.strftime("%Y-%m-%d") if entity.latest_financial_year_end else "",
+                ])
+                total_income += entity.latest_income or 0
+                total_expenditure += entity.latest_expenditure or 0
+        
+        if not rows:
+            ws.write(0, 0, "No financial data available")
             return
         
-        df = pd.DataFrame(data)
+        totals = ["TOTALS", None, None, total_income, total_expenditure, total_income - total_expenditure, None]
+        
+        currency = {header: self.CURRENCY_FORMAT for header in headers[3:6]}
+        widths = [len(str(value)) if value is not None else 0 for value in totals]
+        next_row = self._write_table(wb, ws, headers, rows, number_formats=currency, widths=widths)
         
-        # Write headers
-        for col_idx, column in enumerate(df.columns, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=column)
-            cell.fill = self.HEADER_FILL
-            cell.font = self.HEADER_FONT
-            cell.border = self.THIN_BORDER
-        
-        # Write data
-        for row_idx, row in enumerate(df.values, start=2):
-            for col_idx, value in enumerate(row, start=1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                cell.border = self.THIN_BORDER
-                if row_idx % 2 == 0:
-                    cell.fill = self.ALT_ROW_FILL
-                # Format currency columns
-                if col_idx in (4, 5, 6) and isinstance(value, (int, float)):
-                    cell.number_format = '£#,##0.00'
-        
-        # Summary row
-        total_row = len(data) + 3
-        ws[f'A{total_row}'] = "TOTALS"
-        ws[f'A{total_row}'].font = Font(bold=True)
-        
-        total_income = sum(d.get("Latest Income") or 0 for d in data)
-        total_expenditure = sum(d.get("Latest Expenditure") or 0 for d in data)
-        
-        ws[f'D{total_row}'] = total_income
-        ws[f'D{total_row}'].number_format = '£#,##0.00'
-        ws[f'D{total_row}'].font = Font(bold=True)
-        
-        ws[f'E{total_row}'] = total_expenditure
-        ws[f'E{total_row}'].number_format = '£#,##0.00'
-        ws[f'E{total_row}'].font = Font(bold=True)
-        
-        ws[f'F{total_row}'] = total_income - total_expenditure
-        ws[f'F{total_row}'].number_format = '£#,##0.00'
-        ws[f'F{total_row}'].font = Font(bold=True)
-        
-        # Auto-fit columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column].width = min(max_length + 2, 50)
+        # Summary row, one blank row below the data
+        total_row = next_row + 1
+        ws.write(total_row, 0, totals[0], self._format(wb, bold=True))
+        total_format = self._format(wb, bold=True, num_format=self.CURRENCY_FORMAT)
+        for col_idx in range(3, 6):
+            ws.write(total_row, col_idx, totals[col_idx], total_format)
     
     async def _create_enriched_sheet(self, wb: Workbook, entities: List[Entity]):
         """Create enriched data sheet with trustees and subsidiaries."""
-        ws = wb.create_sheet("Enriched Data")
+        ws = wb.add_worksheet("Enriched Data")
         
-        # Prepare trustees data
-        trustees_data = []
-        subsidiaries_data = []
+        # Prepare trustees and subsidiaries rows
+        trustees_rows = []
+        subsidiaries_rows = []
         
         for entity in entities:
             if entity.enriched_data:
+                charity_name = sanitize_cell_value(entity.resolved_name or entity.original_name)
+                charity_number = sanitize_cell_value(entity.charity_number)
+                
                 trustees = entity.enriched_data.get("trustees", [])
                 for trustee in trustees:
-                    trustees_data.append({
-                        "Charity Name": sanitize_cell_value(entity.resolved_name or entity.original_name),
-                        "Charity Number": sanitize_cell_value(entity.charity_number),
-                        "Trustee Name": sanitize_cell_value(trustee.get("name", "")),
-                        "Trustee ID": sanitize_cell_value(trustee.get("id", "")),
-                    })
+                    trustees_rows.append([
+                        charity_name,
+                        charity_number,
+                        sanitize_cell_value(trustee.get("name", "")),
+                        sanitize_cell_value(trustee.get("id", "")),
+                    ])
 
                 subsidiaries = entity.enriched_data.get("subsidiaries", [])
                 for sub in subsidiaries:
-                    subsidiaries_data.append({
-                        "Charity Name": sanitize_cell_value(entity.resolved_name or entity.original_name),
-                        "Charity Number": sanitize_cell_value(entity.charity_number),
-                        "Subsidiary Name": sanitize_cell_value(sub.get("name", "")),
-                        "Company Number": sanitize_cell_value(sub.get("company_number", "")),
-                    })
+                    subsidiaries_rows.append([
+                        charity_name,
+                        charity_number,
+                        sanitize_cell_value(sub.get("name", "")),
+                        sanitize_cell_value(sub.get("company_number", "")),
+                    ])
+        
+        trustee_headers = ["Charity Name", "Charity Number", "Trustee Name", "Trustee ID"]
+        subsidiary_headers = ["Charity Name", "Charity Number", "Subsidiary Name", "Company Number"]
+        widths = [0] * len(trustee_headers)
+        
+        section_format = self._format(wb, bold=True, font_size=14)
         
         # Write Trustees section
-        ws['A1'] = "TRUSTEES"
-        ws['A1'].font = Font(bold=True, size=14)
+        ws.write(0, 0, "TRUSTEES", section_format)
         
-        if trustees_data:
-            df = pd.DataFrame(trustees_data)
-            
-            for col_idx, column in enumerate(df.columns, start=1):
-                cell = ws.cell(row=2, column=col_idx, value=column)
-                cell.fill = self.HEADER_FILL
-                cell.font = self.HEADER_FONT
-                cell.border = self.THIN_BORDER
-            
-            for row_idx, row in enumerate(df.values, start=3):
-                for col_idx, value in enumerate(row, start=1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    cell.border = self.THIN_BORDER
-                    if row_idx % 2 == 0:
-                        cell.fill = self.ALT_ROW_FILL
-            
-            next_row = len(trustees_data) + 5
+        if trustees_rows:
+            self._write_table(wb, ws, trustee_headers, trustees_rows, first_row=1, widths=widths)
+            next_row = len(trustees_rows) + 4
         else:
-            ws['A3'] = "No trustee data available"
-            next_row = 6
+            ws.write(2, 0, "No trustee data available")
+            next_row = 5
         
         # Write Subsidiaries section
-        ws[f'A{next_row}'] = "SUBSIDIARIES"
-        ws[f'A{next_row}'].font = Font(bold=True, size=14)
-        
-        if subsidiaries_data:
-            df = pd.DataFrame(subsidiaries_data)
-            
-            for col_idx, column in enumerate(df.columns, start=1):
-                cell = ws.cell(row=next_row + 1, column=col_idx, value=column)
-                cell.fill = self.SUBHEADER_FILL
-                cell.font = self.HEADER_FONT
-                cell.border = self.THIN_BORDER
-            
-            for row_idx, row in enumerate(df.values, start=next_row + 2):
-                for col_idx, value in enumerate(row, start=1):
-                    cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                    cell.border = self.THIN_BORDER
-                    if row_idx % 2 == 0:
-                        cell.fill = self.ALT_ROW_FILL
+        ws.write(next_row, 0, "SUBSIDIARIES", section_format)
+        
+        if subsidiaries_rows:
+            self._write_table(
+                wb,
+                ws,
+                subsidiary_headers,
+                subsidiaries_rows,
+                first_row=next_row + 1,
+                header_format=self.SUBHEADER_FORMAT,
+                widths=widths,
+            )
         else:
-            ws[f'A{next_row + 2}'] = "No subsidiary data available"
-        
-        # Auto-fit columns
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            ws.column_dimensions[column].width = min(max_length + 2, 50)
+            ws.write(next_row + 2, 0, "No subsidiary data available")
     
     async def export_to_csv(self, batch_id: UUID) -> bytes:
         """Export basic entity data to CSV with formula injection protection."""
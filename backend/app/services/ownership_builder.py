@@ -8,7 +8,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.entity import Entity, EntityOwnership, EntityType
-from app.services.charity_commission import CharityCommissionService
+from app.services.charity_commission import CharityCommissionService, get_charity_service
 import structlog
 
 logger = structlog.get_logger()
@@ -19,13 +19,13 @@ class OwnershipTreeBuilder:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.charity_service = CharityCommissionService()
+        self.charity_service = get_charity_service()
         self._visited_charities: Set[str] = set()
         self._visited_companies: Set[str] = set()
     
     async def close(self):
         """Clean up resources."""
-        await self.charity_service.close()
+        # The charity service is shared process-wide and closed on app shutdown
     
     async def build_tree_for_entity(
         self,